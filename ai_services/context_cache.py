@@ -0,0 +1,72 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+def cache_owner(api_key):
+    """Stable, non-secret identifier for the key that owns a provider cache"""
+    return hashlib.sha256((api_key or "").encode('utf-8')).hexdigest()[:16]
+
+class ContextCacheRegistry:
+    """Local book-keeping for provider-side context caches.
+
+    Maps (owner, model, document) to a provider cache handle and the time
+    it expires, so follow-up questions reuse the handle instead of
+    re-uploading the document. When ``create`` returns ``None`` (caching
+    is permanently unavailable for that content) the miss is remembered
+    for ``negative_ttl`` seconds; if it raises, nothing is remembered and
+    the next call tries again.
+    """
+
+    def __init__(self, max_entries=256, expiry_margin=60, negative_ttl=300):
+        self.max_entries = max_entries
+        self.expiry_margin = expiry_margin
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # key -> (handle, expires_at)
+        self._lock = threading.Lock()
+        self._creating = {}
+
+    def _live(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        margin = self.expiry_margin if entry[0] is not None else 0
+        if entry[1] - margin <= time.time():
+            return False, None
+        return True, entry[0]
+
+    def get_or_create(self, key, create, ttl):
+        """Return a live handle for key (or None if caching is unavailable), calling create() if needed"""
+        with self._lock:
+            live, handle = self._live(key)
+            if live:
+                self._entries.move_to_end(key)
+                return handle
+            creating = self._creating.get(key)
+            if creating is None:
+                creating = self._creating[key] = threading.Lock()
+
+        # Only one thread creates a given cache; the rest wait for its handle
+        with creating:
+            with self._lock:
+                live, handle = self._live(key)
+                if live:
+                    return handle
+            try:
+                handle = create()
+                with self._lock:
+                    self._entries[key] = (handle, time.time() + (ttl if handle is not None else self.negative_ttl))
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                return handle
+            finally:
+                with self._lock:
+                    self._creating.pop(key, None)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+# Gemini cached-content handles for this process
+gemini_context_caches = ContextCacheRegistry()
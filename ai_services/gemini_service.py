@@ -1,8 +1,14 @@
 import os
 import json
+import time
 import logging
 from google import genai
-from google.genai import types
+from google.genai import types, errors
+from ai_services.single_flight import provider_flight, flight_key
+from ai_services.usage import record_usage
+from ai_services.context_cache import gemini_context_caches, cache_owner
+
+logger = logging.getLogger(__name__)
 
 class GeminiService:
     def __init__(self, api_key=None):
@@ -15,19 +21,86 @@ class GeminiService:
     def is_available(self):
         return self.client is not None
     
-    def generate_content(self, prompt, model="gemini-2.5-flash"):
-        """Generate content using Gemini"""
+    def generate_content(self, prompt, model="gemini-2.5-flash", response_mime_type=None, cached_content=None):
+        """Generate content using Gemini (pass response_mime_type="application/json" for JSON output)"""
         if not self.is_available():
             raise Exception("Gemini API key not configured")
         
         if not self.client:
             raise Exception("Gemini client not initialized")
         
-        response = self.client.models.generate_content(
-            model=model,
-            contents=prompt
-        )
-        return response.text or "No response generated"
+        started = time.time()
+        usage = {}
+        
+        def create():
+            config = None
+            if response_mime_type or cached_content:
+                config = types.GenerateContentConfig(
+                    response_mime_type=response_mime_type,
+                    cached_content=cached_content
+                )
+            response = self.client.models.generate_content(
+                model=model,
+                contents=prompt,
+                config=config
+            )
+            metadata = response.usage_metadata
+            usage['prompt_tokens'] = metadata.prompt_token_count if metadata else 0
+            usage['completion_tokens'] = metadata.candidates_token_count if metadata else 0
+            return response.text or "No response generated"
+        
+        # Identical concurrent requests share one upstream call
+        result = provider_flight.do(flight_key("gemini", model, prompt, response_mime_type, cached_content), create)
+        record_usage("gemini", model, started, usage, cache_hit=not usage)
+        return result
+    
+    def generate_with_context_cache(self, system_instruction, context, prompt, cache_id,
+                                    model="gemini-2.5-flash", ttl_seconds=3600):
+        """Generate with a large, stable context held in a Gemini cached content.
+
+        The cache handle is created once per (key, model, cache_id) and
+        reused until it expires. If caching is unavailable (e.g. the
+        context is below the model's minimum size) the full prompt is sent;
+        transient failures to create the cache are retried on the next call.
+        """
+        if not self.is_available():
+            raise Exception("Gemini API key not configured")
+        
+        def create_cache():
+            try:
+                cache = self.client.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=system_instruction,
+                        contents=[context],
+                        ttl=f"{ttl_seconds}s",
+                        display_name=f"ctx-{cache_id}"[:128]
+                    )
+                )
+                return cache.name
+            except errors.ClientError as e:
+                # Content below the minimum size or a model without caching
+                # won't succeed on retry; rate limits and auth errors might
+                if e.code in (400, 404):
+                    logger.info(f"Gemini context caching unavailable: {e}")
+                    return None
+                raise
+        
+        key = (cache_owner(self.api_key), model, cache_id)
+        try:
+            cache_name = gemini_context_caches.get_or_create(key, create_cache, ttl_seconds)
+        except Exception as e:
+            logger.info(f"Gemini context cache creation failed, sending full prompt: {e}")
+            cache_name = None
+        if cache_name:
+            try:
+                return self.generate_content(prompt, model=model, cached_content=cache_name)
+            except Exception as e:
+                # The cache may have been evicted server-side; fall back below
+                logger.info(f"Gemini cached content {cache_name} failed: {e}")
+                gemini_context_caches.invalidate(key)
+        
+        return self.generate_content(f"{system_instruction}\n\n{context}\n\n{prompt}", model=model)
     
     def summarize_text(self, text):
         """Summarize text using Gemini"""
@@ -50,14 +123,21 @@ class GeminiService:
         if not self.client:
             raise Exception("Gemini client not initialized")
         
+        model = "gemini-2.0-flash-preview-image-generation"
+        started = time.time()
         response = self.client.models.generate_content(
             # IMPORTANT: only this gemini model supports image generation
-            model="gemini-2.0-flash-preview-image-generation",
+            model=model,
             contents=prompt,
             config=types.GenerateContentConfig(
                 response_modalities=['TEXT', 'IMAGE']
             )
         )
+        metadata = response.usage_metadata
+        record_usage("gemini", model, started, {
+            'prompt_tokens': metadata.prompt_token_count if metadata else 0,
+            'completion_tokens': metadata.candidates_token_count if metadata else 0,
+        })
         
         if not response.candidates:
             raise Exception("No image generated")
@@ -87,6 +167,11 @@ class GeminiService:
         prompt = f"Please review the following code for potential issues, bugs, security vulnerabilities, and suggest improvements:\n\n```\n{code}\n```"
         return self.generate_content(prompt, model="gemini-2.5-pro")
     
+    def optimize_code(self, code):
+        """Optimize code for better performance"""
+        prompt = f"Please optimize the following code for better performance, readability, and maintainability:\n\n```\n{code}\n```"
+        return self.generate_content(prompt, model="gemini-2.5-pro")
+    
     def generate_code(self, description):
         """Generate code based on description"""
         prompt = f"Please generate clean, well-commented code based on this description: {description}"
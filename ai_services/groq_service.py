@@ -1,6 +1,9 @@
 import os
 import json
+import time
 import requests
+from ai_services.single_flight import provider_flight, flight_key
+from ai_services.usage import record_usage
 
 class GroqService:
     def __init__(self, api_key=None):
@@ -26,17 +29,28 @@ class GroqService:
             **kwargs
         }
         
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=data
-        )
+        started = time.time()
+        usage = {}
         
-        if response.status_code != 200:
-            raise Exception(f"Groq API error: {response.text}")
+        def create():
+            response = requests.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=data
+            )
+            
+            if response.status_code != 200:
+                raise Exception(f"Groq API error: {response.text}")
+            
+            result = response.json()
+            usage['prompt_tokens'] = result.get("usage", {}).get("prompt_tokens", 0)
+            usage['completion_tokens'] = result.get("usage", {}).get("completion_tokens", 0)
+            return result["choices"][0]["message"]["content"]
         
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
+        # Identical concurrent requests share one upstream call
+        content = provider_flight.do(flight_key("groq", model, messages, kwargs), create)
+        record_usage("groq", model, started, usage, cache_hit=not usage)
+        return content
     
     def summarize_text(self, text):
         """Summarize text using Groq"""
@@ -56,6 +70,12 @@ class GroqService:
         messages = [{"role": "user", "content": prompt}]
         return self.chat_completion(messages)
     
+    def optimize_code(self, code):
+        """Optimize code for better performance"""
+        prompt = f"Please optimize the following code for better performance, readability, and maintainability:\n\n```\n{code}\n```"
+        messages = [{"role": "user", "content": prompt}]
+        return self.chat_completion(messages)
+    
     def generate_code(self, description):
         """Generate code based on description"""
         prompt = f"Please generate clean, well-commented code based on this description: {description}"
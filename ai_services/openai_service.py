@@ -1,6 +1,9 @@
 import os
 import json
+import time
 from openai import OpenAI
+from ai_services.single_flight import provider_flight, flight_key
+from ai_services.usage import record_usage
 
 class OpenAIService:
     def __init__(self, api_key=None):
@@ -25,12 +28,23 @@ class OpenAIService:
         if not self.client:
             raise Exception("OpenAI client not initialized")
         
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            **kwargs
-        )
-        return response.choices[0].message.content
+        started = time.time()
+        usage = {}
+        
+        def create():
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                **kwargs
+            )
+            usage['prompt_tokens'] = response.usage.prompt_tokens if response.usage else 0
+            usage['completion_tokens'] = response.usage.completion_tokens if response.usage else 0
+            return response.choices[0].message.content
+        
+        # Identical concurrent requests share one upstream call
+        result = provider_flight.do(flight_key("openai", model, messages, kwargs), create)
+        record_usage("openai", model, started, usage, cache_hit=not usage)
+        return result
     
     def summarize_text(self, text):
         """Summarize text using OpenAI"""
@@ -77,12 +91,15 @@ class OpenAIService:
         if not self.client:
             raise Exception("OpenAI client not initialized")
         
+        started = time.time()
         response = self.client.images.generate(
             model="dall-e-3",
             prompt=prompt,
             n=1,
             size="1024x1024",
         )
+        # Image calls are billed per image, not per token
+        record_usage("openai", "dall-e-3", started, {})
         if response.data and len(response.data) > 0:
             return {"url": response.data[0].url}
         else:
@@ -100,6 +117,12 @@ class OpenAIService:
         messages = [{"role": "user", "content": prompt}]
         return self.chat_completion(messages)
     
+    def optimize_code(self, code):
+        """Optimize code for better performance"""
+        prompt = f"Please optimize the following code for better performance, readability, and maintainability:\n\n```\n{code}\n```"
+        messages = [{"role": "user", "content": prompt}]
+        return self.chat_completion(messages)
+    
     def generate_code(self, description):
         """Generate code based on description"""
         prompt = f"Please generate clean, well-commented code based on this description: {description}"
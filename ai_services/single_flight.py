@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def flight_key(provider, model, *payload):
+    """Key identifying identical provider calls: (provider, model, prompt hash)"""
+    digest = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    return f"{provider}:{model}:{digest}"
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SQLiteLease:
+    """Cross-process leader election and result hand-off via a SQLite file.
+
+    The first worker to insert a row for a key owns the upstream call and
+    publishes its result there; other workers poll until it appears, the
+    owner gives up, or the lease expires.
+
+    A published result stays readable for ``grace`` seconds so that workers
+    already polling pick it up; it only needs to outlast a few poll
+    intervals and is not a result cache.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, path, ttl=120, grace=0.5, poll_interval=0.1):
+        self.path = path
+        self.ttl = ttl
+        self.grace = grace
+        self.poll_interval = poll_interval
+        self.owner = uuid.uuid4().hex
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS flights ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "done INTEGER NOT NULL DEFAULT 0, result TEXT)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM flights WHERE expires_at <= ?", (now,))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO flights (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, self.owner, now + self.ttl),
+            )
+            return cursor.rowcount == 1
+
+    def publish(self, key, result):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE flights SET done = 1, result = ?, expires_at = ? WHERE key = ? AND owner = ?",
+                (json.dumps(result), time.time() + self.grace, key, self.owner),
+            )
+
+    def release(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def wait(self, key):
+        """Wait for another worker's result; returns _MISSING if there won't be one"""
+        conn = self._connect()
+        while True:
+            row = conn.execute(
+                "SELECT done, result, expires_at FROM flights WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[2] <= time.time():
+                return self._MISSING
+            if row[0]:
+                return json.loads(row[1])
+            time.sleep(self.poll_interval)
+
+class SingleFlight:
+    """Share one upstream call among concurrent identical requests.
+
+    Within a process, callers with the same key wait on the first caller's
+    result. With a lease database configured, the same holds across
+    gunicorn workers. If the shared call fails, waiting callers retry once
+    through the same flight, so a burst still makes a single upstream retry
+    rather than one per caller; if that fails too, the error is raised.
+    """
+
+    def __init__(self, lease=None):
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, retry=True):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is None:
+                return call.result
+            if not retry:
+                raise call.error
+            return self.do(key, fn, retry=False)
+
+        try:
+            call.result = self._run_leader(key, fn, retry)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run_leader(self, key, fn, retry=True):
+        if self.lease is None:
+            return fn()
+
+        try:
+            acquired = self.lease.acquire(key)
+        except Exception as e:
+            logger.error(f"Single-flight lease unavailable: {e}")
+            return fn()
+
+        if not acquired:
+            try:
+                result = self.lease.wait(key)
+            except Exception as e:
+                logger.error(f"Error waiting on single-flight lease: {e}")
+                result = SQLiteLease._MISSING
+            if result is not SQLiteLease._MISSING:
+                return result
+            # The other worker failed or gave up: compete for the lease again
+            # so only one of the waiting workers retries upstream
+            if retry:
+                return self._run_leader(key, fn, retry=False)
+            return fn()
+
+        try:
+            result = fn()
+        except Exception:
+            self.lease.release(key)
+            raise
+        try:
+            self.lease.publish(key, result)
+        except Exception as e:
+            logger.error(f"Error publishing single-flight result: {e}")
+        return result
+
+def _create_provider_flight():
+    path = os.environ.get("SINGLE_FLIGHT_DB")
+    return SingleFlight(SQLiteLease(path) if path else None)
+
+# Shared by all provider services in this process
+provider_flight = _create_provider_flight()
@@ -0,0 +1,92 @@
+import time
+import logging
+import threading
+import contextvars
+
+logger = logging.getLogger(__name__)
+
+# (user_id, tool) of the request currently calling a provider
+_usage_context = contextvars.ContextVar('usage_context', default=(None, None))
+
+def set_usage_context(user_id, tool):
+    """Attribute provider calls made from this context to a user and tool"""
+    _usage_context.set((user_id, tool))
+
+def bind_usage_context(fn):
+    """Wrap fn so it runs with the caller's usage context, e.g. on a thread pool"""
+    ctx = contextvars.copy_context()
+    
+    def run(*args, **kwargs):
+        return ctx.run(fn, *args, **kwargs)
+    return run
+
+class UsageRecorder:
+    """Buffers usage events and hands them to a sink in batches.
+
+    The sink is a callable taking a list of event dicts; the app installs
+    one at startup. Until then events are dropped.
+    """
+
+    def __init__(self, flush_size=200, flush_interval=5.0, max_buffer=10000):
+        self.sink = None
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def record(self, provider, model, started, usage, cache_hit):
+        if self.sink is None:
+            return
+        user_id, tool = _usage_context.get()
+        event = {
+            'user_id': user_id,
+            'tool': tool or 'unknown',
+            'provider': provider,
+            'model': model,
+            'prompt_tokens': usage.get('prompt_tokens') or 0,
+            'completion_tokens': usage.get('completion_tokens') or 0,
+            'latency_ms': int((time.time() - started) * 1000),
+            'cache_hit': cache_hit,
+            'created_at': time.time(),
+        }
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                return
+            self._buffer.append(event)
+            full = len(self._buffer) >= self.flush_size
+        self._ensure_worker()
+        if full:
+            self._wakeup.set()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True, name="usage-flush")
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if not events or self.sink is None:
+            return
+        try:
+            self.sink(events)
+        except Exception as e:
+            logger.error(f"Error flushing {len(events)} usage events: {e}")
+
+usage_recorder = UsageRecorder()
+
+def record_usage(provider, model, started, usage, cache_hit=False):
+    """Record one provider call; ``usage`` holds prompt/completion token counts"""
+    usage_recorder.record(provider, model, started, usage, cache_hit)
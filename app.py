@@ -12,6 +12,12 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
+# Keep session data server-side; the cookie only carries an opaque id
+app.config["SESSION_BACKEND"] = os.environ.get("SESSION_BACKEND", "sqlite")
+app.config["SESSION_CACHE_TTL"] = int(os.environ.get("SESSION_CACHE_TTL", "2"))
+from session_store import create_session_interface
+app.session_interface = create_session_interface(app)
+
 # Configure CORS
 CORS(app)
 
@@ -33,13 +39,21 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 from extensions import db
 db.init_app(app)
 
+# Batch provider usage events into the database
+from usage_log import init_usage_log
+init_usage_log(app)
+
 # Import and register routes
 from routes import register_routes
 register_routes(app)
 
+# Fingerprinted, precompressed static assets
+from assets import init_assets
+init_assets(app)
+
 # Initialize database and create default user
 with app.app_context():
-    from models import User, create_default_user  # Import models BEFORE db.create_all()
+    from models import User, UsageEvent, UsageRollup, create_default_user  # Import models BEFORE db.create_all()
     
     db.create_all()  # Creates tables if they don't exist
     create_default_user()  # Creates default user if none exists
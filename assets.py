@@ -0,0 +1,107 @@
+import os
+import gzip
+import hashlib
+import logging
+import mimetypes
+from flask import Response, request, url_for, abort
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ONE_YEAR = 365 * 24 * 3600
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={ONE_YEAR}, immutable"
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+MIN_COMPRESS_SIZE = 512
+# Directories under static/ that hold runtime output rather than build assets
+SKIP_DIRS = ('generated_images',)
+
+class Asset:
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.variants = {'identity': data}
+        if filename.endswith(COMPRESSIBLE_EXTENSIONS) and len(data) >= MIN_COMPRESS_SIZE:
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gz) < len(data):
+                self.variants['gzip'] = gz
+            if brotli is not None:
+                br = brotli.compress(data)
+                if len(br) < len(data):
+                    self.variants['br'] = br
+
+    def choose_encoding(self, accept_encodings):
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+class AssetManifest:
+    """Content-hashed, precompressed copies of the files under static/"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.assets = {}
+
+    def build(self):
+        assets = {}
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    assets[filename] = Asset(filename, f.read())
+        self.assets = assets
+        logger.info(f"Built asset manifest with {len(assets)} files")
+
+    def url(self, filename):
+        """Fingerprinted URL for a static file, falling back to the plain static URL"""
+        asset = self.assets.get(filename)
+        if asset is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', digest=asset.digest, filename=filename)
+
+def init_assets(app):
+    """Register the fingerprinted asset route and the ``asset_url`` template helper"""
+    manifest = AssetManifest(app.static_folder)
+    manifest.build()
+
+    @app.route('/assets/<digest>/<path:filename>')
+    def assets(digest, filename):
+        asset = manifest.assets.get(filename)
+        if asset is None:
+            abort(404)
+
+        encoding = asset.choose_encoding(request.accept_encodings)
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f"{asset.digest}-{encoding}")
+
+        if digest == asset.digest:
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            # Stale fingerprint from an older page: serve current content
+            # but don't let it be cached under the old URL.
+            response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    @app.after_request
+    def cache_generated_images(response):
+        # Generated images get a unique name and never change, so let
+        # browsers keep them; the static view already answers ETag/304.
+        if request.endpoint == 'static' and response.status_code in (200, 304):
+            filename = (request.view_args or {}).get('filename', '')
+            if filename.startswith('generated_images/'):
+                response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    app.jinja_env.globals['asset_url'] = manifest.url
+    app.extensions['asset_manifest'] = manifest
+    return manifest
@@ -48,6 +48,40 @@ class UploadedFile(db.Model):
     upload_time = db.Column(db.DateTime, default=datetime.utcnow)
     file_size = db.Column(db.Integer)
 
+class UsageEvent(db.Model):
+    """Append-only log of provider calls, written in batches"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    tool = db.Column(db.String(50), nullable=False)
+    provider = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    prompt_tokens = db.Column(db.Integer, default=0)
+    completion_tokens = db.Column(db.Integer, default=0)
+    latency_ms = db.Column(db.Integer, default=0)
+    cache_hit = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class UsageRollup(db.Model):
+    """Usage pre-aggregated per hour, user, tool, provider and model"""
+    id = db.Column(db.Integer, primary_key=True)
+    hour = db.Column(db.DateTime, nullable=False)
+    # 0 for calls made outside a user context: NULLs never match in the
+    # unique constraint, so they would get a new row on every flush
+    user_id = db.Column(db.Integer, nullable=False, default=0)
+    tool = db.Column(db.String(50), nullable=False)
+    provider = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    calls = db.Column(db.Integer, default=0)
+    cache_hits = db.Column(db.Integer, default=0)
+    prompt_tokens = db.Column(db.Integer, default=0)
+    completion_tokens = db.Column(db.Integer, default=0)
+    total_latency_ms = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('hour', 'user_id', 'tool', 'provider', 'model', name='uq_usage_rollup_bucket'),
+        db.Index('ix_usage_rollup_user_hour', 'user_id', 'hour'),
+    )
+
 def create_default_user():
     from extensions import db
     if not User.query.first():
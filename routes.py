@@ -1,8 +1,16 @@
 import os
+import json
 import logging
-from flask import render_template, request, jsonify, session, redirect, url_for, flash
+from flask import render_template, request, jsonify, session, redirect, url_for, flash, Response, stream_with_context
 from werkzeug.utils import secure_filename
 from extensions import db
+from ai_services.usage import set_usage_context
+
+MAX_SENTIMENT_TEXTS = 5000
+
+# A multi-file upload carries a whole set of documents, so it gets a larger
+# request cap than the app-wide MAX_CONTENT_LENGTH meant for single files
+MAX_COLLECTION_UPLOAD_SIZE = 200 * 1024 * 1024  # 200MB
 
 # Initialize tools (import inside function to avoid circular imports)
 def get_tools():
@@ -44,7 +52,11 @@ def register_routes(app):
         # Get recent chat sessions
         recent_sessions = ChatSession.query.filter_by(user_id=user_id).order_by(ChatSession.created_at.desc()).limit(5).all()
         
-        return render_template('dashboard.html', api_keys=api_keys, recent_sessions=recent_sessions)
+        # Usage comes from hourly rollups, so this stays cheap however many calls were made
+        from usage_log import get_usage_summary
+        usage = get_usage_summary(user_id)
+        
+        return render_template('dashboard.html', api_keys=api_keys, recent_sessions=recent_sessions, usage=usage)
 
     @app.route('/api-keys', methods=['GET', 'POST'])
     def api_keys():
@@ -93,6 +105,7 @@ def register_routes(app):
         tools = get_tools()
         
         if request.method == 'POST':
+            set_usage_context(user_id, 'pdf_chat')
             action = request.form.get('action')
             
             if action == 'upload':
@@ -108,6 +121,12 @@ def register_routes(app):
                     file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                     file.save(file_path)
                     
+                    # Parse the page tree only; pages are indexed in the background
+                    try:
+                        document = tools['pdf_chat'].open_document(file_path, replace=True)
+                    except Exception as e:
+                        return jsonify({'error': f'Error processing PDF: {str(e)}'}), 400
+                    
                     # Save file info to database
                     uploaded_file = UploadedFile()
                     uploaded_file.user_id = user_id
@@ -118,14 +137,11 @@ def register_routes(app):
                     db.session.add(uploaded_file)
                     db.session.commit()
                     
-                    # Extract text from PDF
-                    try:
-                        text_content = tools['pdf_chat'].extract_pdf_text(file_path)
-                        session['pdf_content'] = text_content
-                        session['pdf_filename'] = filename
-                        return jsonify({'success': True, 'filename': filename})
-                    except Exception as e:
-                        return jsonify({'error': f'Error processing PDF: {str(e)}'}), 400
+                    session.pop('pdf_content', None)
+                    session.pop('pdf_collection', None)
+                    session['pdf_filename'] = filename
+                    session['pdf_path'] = file_path
+                    return jsonify({'success': True, 'filename': filename, 'pages': document.page_count})
                 else:
                     return jsonify({'error': 'Please upload a PDF file'}), 400
             
@@ -134,20 +150,89 @@ def register_routes(app):
                 if not question:
                     return jsonify({'error': 'No question provided'}), 400
                 
-                pdf_content = session.get('pdf_content')
-                if not pdf_content:
+                collection_paths = [p for p in session.get('pdf_collection', []) if os.path.exists(p)]
+                pdf_path = session.get('pdf_path')
+                if not collection_paths and (not pdf_path or not os.path.exists(pdf_path)):
                     return jsonify({'error': 'Please upload a PDF first'}), 400
                 
                 try:
                     # Get user's API keys
                     api_keys = get_user_api_keys(user_id)
-                    answer = tools['pdf_chat'].ask_question(question, pdf_content, api_keys)
+                    if collection_paths:
+                        document = tools['pdf_chat'].open_collection(collection_paths)
+                    else:
+                        document = tools['pdf_chat'].open_document(pdf_path)
+                    answer = tools['pdf_chat'].ask_question(question, document, api_keys)
                     return jsonify({'answer': answer})
                 except Exception as e:
                     return jsonify({'error': f'Error generating answer: {str(e)}'}), 400
         
         return render_template('pdf_chat.html')
 
+    @app.errorhandler(413)
+    def request_too_large(e):
+        """JSON error for the upload endpoints the page calls with fetch"""
+        if request.path != '/pdf-chat/upload-multiple':
+            return e
+        limit_mb = (request.max_content_length or 0) // (1024 * 1024)
+        return jsonify({'error': f'Upload too large: the PDFs together must be under {limit_mb}MB'}), 413
+
+    @app.route('/pdf-chat/upload-multiple', methods=['POST'])
+    def pdf_chat_upload_multiple():
+        """Upload several PDFs and ingest them concurrently as one collection"""
+        # Must be set before request.files is first read
+        request.max_content_length = MAX_COLLECTION_UPLOAD_SIZE
+        user_id = session.get('user_id', 1)
+        
+        # Import models inside function
+        _, _, _, _, UploadedFile = get_models()
+        tools = get_tools()
+        
+        files = [f for f in request.files.getlist('files') if f and f.filename]
+        if not files:
+            return jsonify({'error': 'No files provided'}), 400
+        
+        if not all(f.filename.lower().endswith('.pdf') for f in files):
+            return jsonify({'error': 'Please upload only PDF files'}), 400
+        
+        file_paths = []
+        for file in files:
+            filename = secure_filename(file.filename)
+            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            file.save(file_path)
+            if file_path in file_paths:
+                continue
+            file_paths.append(file_path)
+            
+            # Save file info to database
+            uploaded_file = UploadedFile()
+            uploaded_file.user_id = user_id
+            uploaded_file.filename = filename
+            uploaded_file.file_path = file_path
+            uploaded_file.file_type = 'pdf'
+            uploaded_file.file_size = os.path.getsize(file_path)
+            db.session.add(uploaded_file)
+        db.session.commit()
+        
+        collection = tools['pdf_chat'].open_collection(file_paths, replace=True)
+        session.pop('pdf_content', None)
+        session.pop('pdf_path', None)
+        session['pdf_collection'] = file_paths
+        session['pdf_filename'] = ', '.join(os.path.basename(p) for p in file_paths)
+        return jsonify({'success': True, 'files': collection.progress()}), 202
+
+    @app.route('/pdf-chat/collection')
+    def pdf_chat_collection():
+        """Per-file ingestion progress for the current PDF collection"""
+        tools = get_tools()
+        
+        collection_paths = [p for p in session.get('pdf_collection', []) if os.path.exists(p)]
+        if not collection_paths:
+            return jsonify({'error': 'No PDF collection uploaded'}), 404
+        
+        collection = tools['pdf_chat'].open_collection(collection_paths)
+        return jsonify({'ready': collection.ready, 'files': collection.progress()})
+
     @app.route('/summarization', methods=['GET', 'POST'])
     def summarization():
         """Text summarization tool"""
@@ -155,6 +240,7 @@ def register_routes(app):
         tools = get_tools()
         
         if request.method == 'POST':
+            set_usage_context(user_id, 'summarization')
             text = request.form.get('text')
             if not text:
                 return jsonify({'error': 'No text provided'}), 400
@@ -168,6 +254,36 @@ def register_routes(app):
         
         return render_template('summarization.html')
 
+    @app.route('/sentiment/batch', methods=['POST'])
+    def sentiment_batch():
+        """Batched sentiment analysis, streamed back as newline-delimited JSON"""
+        from tools.sentiment_analysis import SentimentAnalysisTool
+        user_id = session.get('user_id', 1)
+        set_usage_context(user_id, 'sentiment')
+        
+        payload = request.get_json(silent=True) or {}
+        texts = payload.get('texts')
+        provider = payload.get('provider') or request.form.get('provider')
+        if texts is None:
+            # Form posts send one text per line
+            texts = [line for line in request.form.get('texts', '').splitlines() if line.strip()]
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'No texts provided'}), 400
+        if len(texts) > MAX_SENTIMENT_TEXTS:
+            return jsonify({'error': f'At most {MAX_SENTIMENT_TEXTS} texts per request'}), 400
+        
+        try:
+            api_keys = get_user_api_keys(user_id)
+            results = SentimentAnalysisTool().analyze_batch([str(t) for t in texts], api_keys, provider)
+        except Exception as e:
+            return jsonify({'error': f'Error analyzing sentiment: {str(e)}'}), 400
+        
+        return Response(
+            stream_with_context(json.dumps(result) + '\n' for result in results),
+            mimetype='application/x-ndjson'
+        )
+
     @app.route('/image-generation', methods=['GET', 'POST'])
     def image_generation():
         """Image generation tool"""
@@ -175,6 +291,7 @@ def register_routes(app):
         tools = get_tools()
         
         if request.method == 'POST':
+            set_usage_context(user_id, 'image_generation')
             prompt = request.form.get('prompt')
             if not prompt:
                 return jsonify({'error': 'No prompt provided'}), 400
@@ -191,13 +308,16 @@ def register_routes(app):
     @app.route('/code-assistant', methods=['GET', 'POST'])
     def code_assistant():
         """Code assistant tool"""
+        from tools.code_assistant import SPLIT_REVIEW_THRESHOLD
         user_id = session.get('user_id', 1)
         tools = get_tools()
         
         if request.method == 'POST':
+            set_usage_context(user_id, 'code_assistant')
             action = request.form.get('action')
             code = request.form.get('code', '')
             question = request.form.get('question', '')
+            language = request.form.get('language')
             
             try:
                 api_keys = get_user_api_keys(user_id)
@@ -205,9 +325,21 @@ def register_routes(app):
                 if action == 'explain':
                     result = tools['code_assistant'].explain_code(code, api_keys)
                 elif action == 'review':
-                    result = tools['code_assistant'].review_code(code, api_keys)
+                    if len(code) > SPLIT_REVIEW_THRESHOLD or request.form.get('split') == 'true':
+                        result = tools['code_assistant'].review_code_by_units(code, api_keys, language)
+                    else:
+                        result = tools['code_assistant'].review_code(code, api_keys)
+                elif action == 'optimize':
+                    result = tools['code_assistant'].optimize_code(code, api_keys)
                 elif action == 'generate':
                     result = tools['code_assistant'].generate_code(question, api_keys)
+                elif action == 'analyze':
+                    # Stream each section as newline-delimited JSON as soon as it finishes
+                    sections = tools['code_assistant'].analyze_code(code, api_keys, language)
+                    return Response(
+                        stream_with_context(json.dumps(section) + '\n' for section in sections),
+                        mimetype='application/x-ndjson'
+                    )
                 else:
                     return jsonify({'error': 'Invalid action'}), 400
                 
@@ -227,8 +359,3 @@ def register_routes(app):
         for key in keys:
             api_keys[key.provider] = key.key_value
         return api_keys
-
-    @app.before_request
-    def ensure_user_session():
-        if 'user_id' not in session:
-            session['user_id'] = 1  # Default to first user for demo
\ No newline at end of file
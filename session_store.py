@@ -0,0 +1,321 @@
+import os
+import re
+import time
+import sqlite3
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+
+logger = logging.getLogger(__name__)
+
+_SID_RE = re.compile(r"[A-Za-z0-9_-]{32,64}")
+
+class SessionBackend:
+    """Key/value storage for serialized sessions.
+
+    Subclass this to plug in another store (Redis, memcached, ...); only
+    ``load``, ``save`` and ``delete`` are required.
+    """
+
+    def load(self, sid):
+        """Return the stored payload for a session id, or None if missing/expired"""
+        raise NotImplementedError
+
+    def save(self, sid, payload, expires_at):
+        raise NotImplementedError
+
+    def delete(self, sid):
+        raise NotImplementedError
+
+class SQLiteSessionBackend(SessionBackend):
+    """Sessions in a standalone SQLite file, one connection per thread"""
+
+    def __init__(self, path, cleanup_interval=3600):
+        self.path = path
+        self.cleanup_interval = cleanup_interval
+        self._local = threading.local()
+        self._last_cleanup = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "sid TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, sid):
+        row = self._connect().execute(
+            "SELECT payload FROM sessions WHERE sid = ? AND expires_at > ?", (sid, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, sid, payload, expires_at):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, payload, expires_at) VALUES (?, ?, ?)",
+                (sid, payload, expires_at),
+            )
+            now = time.time()
+            if now - self._last_cleanup > self.cleanup_interval:
+                self._last_cleanup = now
+                conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+    def delete(self, sid):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+class FilesystemSessionBackend(SessionBackend):
+    """Sessions as one file per id; the file's mtime tracks expiry"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, sid):
+        return os.path.join(self.directory, sid)
+
+    def load(self, sid):
+        path = self._path(sid)
+        try:
+            if os.path.getmtime(path) <= time.time():
+                os.remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, sid, payload, expires_at):
+        path = self._path(sid)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.utime(tmp_path, (expires_at, expires_at))
+        os.replace(tmp_path, path)
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+class ServerSession(dict, SessionMixin):
+    """Session dict that only hits the backend the first time it is used.
+
+    If the backend has no record for the id the client sent, the session
+    gets a fresh id instead, so clients cannot choose their own.
+    """
+
+    def __init__(self, sid, loader, new=False):
+        super().__init__()
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        self._loader = loader
+        self._loaded = new
+
+    def _load(self):
+        if not self._loaded:
+            self._loaded = True
+            data = self._loader(self.sid)
+            if data is None:
+                self.sid = secrets.token_urlsafe(32)
+                self.new = True
+            else:
+                dict.update(self, data)
+        self.accessed = True
+
+    def _touch(self):
+        self._load()
+        self.modified = True
+
+    def __getitem__(self, key):
+        self._load()
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self._load()
+        return super().__contains__(key)
+
+    def __iter__(self):
+        self._load()
+        return super().__iter__()
+
+    def __len__(self):
+        self._load()
+        return super().__len__()
+
+    def get(self, key, default=None):
+        self._load()
+        return super().get(key, default)
+
+    def keys(self):
+        self._load()
+        return super().keys()
+
+    def items(self):
+        self._load()
+        return super().items()
+
+    def values(self):
+        self._load()
+        return super().values()
+
+    def __setitem__(self, key, value):
+        self._touch()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._touch()
+        super().__delitem__(key)
+
+    def setdefault(self, key, default=None):
+        self._load()
+        if key not in self:
+            self.modified = True
+        return super().setdefault(key, default)
+
+    def pop(self, key, *args):
+        self._load()
+        if key in self:
+            self.modified = True
+        return super().pop(key, *args)
+
+    def update(self, *args, **kwargs):
+        self._touch()
+        super().update(*args, **kwargs)
+
+    def clear(self):
+        self._touch()
+        super().clear()
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface that keeps only an opaque id in the cookie.
+
+    Session data lives in a ``SessionBackend`` behind a small in-process
+    read-through cache. The cache absorbs the bursts of requests a single
+    page load makes (assets, polling) and is updated on every local save;
+    writes from other workers can go unseen for up to ``cache_ttl``
+    seconds, so keep it short. Nothing is read until a view actually
+    touches the session, and nothing is written unless it was modified.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, backend, cache_size=1024, cache_ttl=2):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache = OrderedDict()  # sid -> (cached_at, payload)
+        self._cache_lock = threading.Lock()
+
+    def _cache_get(self, sid):
+        with self._cache_lock:
+            entry = self._cache.get(sid)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.cache_ttl:
+                del self._cache[sid]
+                return None
+            self._cache.move_to_end(sid)
+            return entry[1]
+
+    def _cache_put(self, sid, payload):
+        if not self.cache_ttl:
+            return
+        with self._cache_lock:
+            self._cache[sid] = (time.time(), payload)
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_drop(self, sid):
+        with self._cache_lock:
+            self._cache.pop(sid, None)
+
+    def _load(self, sid):
+        payload = self._cache_get(sid)
+        if payload is None:
+            try:
+                payload = self.backend.load(sid)
+            except Exception as e:
+                logger.error(f"Error loading session: {e}")
+                return None
+            if payload is None:
+                return None
+            self._cache_put(sid, payload)
+        try:
+            return self.serializer.loads(payload)
+        except Exception:
+            return None
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not _SID_RE.fullmatch(sid):
+            return ServerSession(secrets.token_urlsafe(32), self._load, new=True)
+        return ServerSession(sid, self._load)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session.modified:
+            return
+
+        if not session:
+            self._cache_drop(session.sid)
+            try:
+                self.backend.delete(session.sid)
+            except Exception as e:
+                logger.error(f"Error deleting session: {e}")
+            if not session.new:
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        payload = self.serializer.dumps(dict(session))
+        expires_at = time.time() + app.permanent_session_lifetime.total_seconds()
+        try:
+            self.backend.save(session.sid, payload, expires_at)
+        except Exception as e:
+            logger.error(f"Error saving session: {e}")
+            return
+        self._cache_put(session.sid, payload)
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add("Cookie")
+
+def create_session_interface(app):
+    """Build the session interface from SESSION_BACKEND ('sqlite' or 'filesystem')"""
+    backend = app.config.get("SESSION_BACKEND", "sqlite")
+    if isinstance(backend, SessionBackend):
+        pass
+    elif backend == "filesystem":
+        backend = FilesystemSessionBackend(os.path.join(app.instance_path, "sessions"))
+    else:
+        os.makedirs(app.instance_path, exist_ok=True)
+        backend = SQLiteSessionBackend(os.path.join(app.instance_path, "sessions.db"))
+    return ServerSideSessionInterface(
+        backend,
+        cache_ttl=app.config.get("SESSION_CACHE_TTL", 2),
+    )
@@ -0,0 +1,305 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const codeInput = document.getElementById('code-input');
+    const codeDescription = document.getElementById('code-description');
+    const languageSelect = document.getElementById('language-select');
+    const aiResponse = document.getElementById('ai-response');
+    const responseActions = document.getElementById('response-actions');
+    const inputSection = document.getElementById('input-section');
+    const generateSection = document.getElementById('generate-section');
+    const lineCount = document.getElementById('line-count');
+    const charCount = document.getElementById('char-count');
+    const exampleBtns = document.querySelectorAll('.example-btn');
+    
+    let currentResponse = '';
+    let currentAction = '';
+
+    // Update counters
+    function updateCounters() {
+        const code = codeInput.value;
+        const lines = code.split('\n').length;
+        const chars = code.length;
+        lineCount.textContent = `${lines} lines`;
+        charCount.textContent = `${chars} characters`;
+    }
+
+    codeInput.addEventListener('input', updateCounters);
+
+    // Example buttons
+    exampleBtns.forEach(btn => {
+        btn.addEventListener('click', function() {
+            codeInput.value = this.dataset.code;
+            updateCounters();
+            showInputSection();
+        });
+    });
+
+    // Action buttons
+    document.getElementById('explain-btn').addEventListener('click', () => performAction('explain'));
+    document.getElementById('review-btn').addEventListener('click', () => performAction('review'));
+    document.getElementById('generate-btn').addEventListener('click', () => {
+        showGenerateSection();
+        currentAction = 'generate';
+    });
+    document.getElementById('optimize-btn').addEventListener('click', () => performAction('optimize'));
+    document.getElementById('analyze-btn').addEventListener('click', () => {
+        showInputSection();
+        performAction('analyze');
+    });
+
+    // Utility buttons
+    document.getElementById('clear-input').addEventListener('click', function() {
+        codeInput.value = '';
+        codeDescription.value = '';
+        updateCounters();
+    });
+
+    document.getElementById('format-code').addEventListener('click', function() {
+        // Simple code formatting (basic indentation)
+        const code = codeInput.value;
+        const formatted = formatCode(code);
+        codeInput.value = formatted;
+        updateCounters();
+    });
+
+    function showInputSection() {
+        inputSection.style.display = 'block';
+        generateSection.style.display = 'none';
+    }
+
+    function showGenerateSection() {
+        inputSection.style.display = 'none';
+        generateSection.style.display = 'block';
+    }
+
+    async function performAction(action) {
+        currentAction = action;
+        
+        let code = '';
+        let question = '';
+        
+        if (action === 'generate') {
+            question = codeDescription.value.trim();
+            if (!question) {
+                alert('Please describe what you want to code.');
+                return;
+            }
+        } else {
+            code = codeInput.value.trim();
+            if (!code) {
+                alert('Please enter some code first.');
+                return;
+            }
+        }
+        
+        // Show loading state
+        aiResponse.innerHTML = `
+            <div class="text-center py-5">
+                <div class="spinner-border text-primary" role="status">
+                    <span class="visually-hidden">Loading...</span>
+                </div>
+                <h5 class="mt-3">Processing your request...</h5>
+                <p class="text-muted">This may take a few moments</p>
+            </div>
+        `;
+        
+        try {
+            const formData = new FormData();
+            formData.append('action', action);
+            formData.append('code', code);
+            formData.append('question', question);
+            
+            const language = languageSelect.value;
+            if (language) {
+                formData.append('language', language);
+            }
+            
+            const response = await fetch('/code-assistant', {
+                method: 'POST',
+                body: formData
+            });
+            
+            if (action === 'analyze' && response.ok) {
+                await displayAnalysisStream(response);
+                return;
+            }
+            
+            const result = await response.json();
+            
+            if (result.result) {
+                displayResponse(result.result, action);
+            } else {
+                aiResponse.innerHTML = `
+                    <div class="alert alert-danger">
+                        <i class="fas fa-exclamation-triangle me-2"></i>
+                        ${result.error || 'Failed to process request'}
+                    </div>
+                `;
+            }
+        } catch (error) {
+            aiResponse.innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error: ${error.message}
+                </div>
+            `;
+        }
+    }
+
+    function displayResponse(response, action) {
+        currentResponse = response;
+        
+        let icon = '';
+        let title = '';
+        
+        switch (action) {
+            case 'explain':
+                icon = 'fas fa-lightbulb';
+                title = 'Code Explanation';
+                break;
+            case 'review':
+                icon = 'fas fa-search';
+                title = 'Code Review';
+                break;
+            case 'generate':
+                icon = 'fas fa-magic';
+                title = 'Generated Code';
+                break;
+            case 'optimize':
+                icon = 'fas fa-rocket';
+                title = 'Optimized Code';
+                break;
+        }
+        
+        aiResponse.innerHTML = `
+            <div class="response-content">
+                <div class="d-flex align-items-center mb-3">
+                    <i class="${icon} me-2 text-primary"></i>
+                    <h6 class="mb-0">${title}</h6>
+                </div>
+                <div class="response-text">${formatResponse(response)}</div>
+            </div>
+        `;
+        
+        responseActions.style.display = 'block';
+    }
+
+    async function displayAnalysisStream(response) {
+        // Each line of the body is one finished section
+        const titles = {explain: 'Code Explanation', review: 'Code Review', optimize: 'Optimized Code'};
+        const icons = {explain: 'fas fa-lightbulb', review: 'fas fa-search', optimize: 'fas fa-rocket'};
+        const sections = [];
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        aiResponse.innerHTML = '<div class="response-content" id="analysis-sections"></div>';
+        const container = document.getElementById('analysis-sections');
+        
+        while (true) {
+            const {done, value} = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, {stream: true});
+            
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (!line) continue;
+                
+                const section = JSON.parse(line);
+                const body = section.result
+                    ? `<div class="response-text">${formatResponse(section.result)}</div>`
+                    : `<div class="alert alert-danger">${section.error}</div>`;
+                container.insertAdjacentHTML('beforeend', `
+                    <div class="mb-4">
+                        <div class="d-flex align-items-center mb-3">
+                            <i class="${icons[section.aspect]} me-2 text-primary"></i>
+                            <h6 class="mb-0">${titles[section.aspect]}</h6>
+                            <span class="badge bg-secondary ms-2">${section.provider}</span>
+                        </div>
+                        ${body}
+                    </div>
+                `);
+                if (section.result) {
+                    sections.push(`## ${titles[section.aspect]}\n\n${section.result}`);
+                }
+            }
+        }
+        
+        currentResponse = sections.join('\n\n');
+        responseActions.style.display = 'block';
+    }
+
+    function formatResponse(response) {
+        // Convert code blocks and preserve formatting
+        return response
+            .replace(/```(\w+)?\n([\s\S]*?)```/g, '<pre class="bg-light p-3 rounded"><code>$2</code></pre>')
+            .replace(/`([^`]+)`/g, '<code class="bg-light px-1 rounded">$1</code>')
+            .replace(/\n/g, '<br>');
+    }
+
+    function formatCode(code) {
+        // Basic code formatting (this is simplified)
+        const lines = code.split('\n');
+        let indentLevel = 0;
+        const indentSize = 4;
+        
+        return lines.map(line => {
+            const trimmed = line.trim();
+            if (trimmed.includes('}') || trimmed.includes(']') || trimmed.includes(')')
+                || trimmed.startsWith('else') || trimmed.startsWith('elif')
+                || trimmed.startsWith('except') || trimmed.startsWith('finally')) {
+                indentLevel = Math.max(0, indentLevel - 1);
+            }
+            
+            const formatted = ' '.repeat(indentLevel * indentSize) + trimmed;
+            
+            if (trimmed.includes('{') || trimmed.includes('[') || trimmed.includes('(')
+                || trimmed.endsWith(':')) {
+                indentLevel++;
+            }
+            
+            return formatted;
+        }).join('\n');
+    }
+
+    // Response action buttons
+    document.getElementById('copy-response').addEventListener('click', function() {
+        navigator.clipboard.writeText(currentResponse).then(() => {
+            this.innerHTML = '<i class="fas fa-check me-1"></i>Copied!';
+            setTimeout(() => {
+                this.innerHTML = '<i class="fas fa-copy me-1"></i>Copy';
+            }, 2000);
+        });
+    });
+
+    document.getElementById('save-response').addEventListener('click', function() {
+        const blob = new Blob([currentResponse], { type: 'text/plain' });
+        const url = URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = `${currentAction}-${Date.now()}.txt`;
+        a.click();
+        URL.revokeObjectURL(url);
+    });
+
+    document.getElementById('insert-code').addEventListener('click', function() {
+        if (currentAction === 'generate' || currentAction === 'optimize') {
+            // Extract code from response (look for code blocks)
+            const codeMatch = currentResponse.match(/```[\w]*\n([\s\S]*?)```/);
+            if (codeMatch) {
+                codeInput.value = codeMatch[1].trim();
+                showInputSection();
+                updateCounters();
+            } else {
+                // If no code block found, insert the whole response
+                codeInput.value = currentResponse;
+                showInputSection();
+                updateCounters();
+            }
+        }
+    });
+
+    // Initialize counters
+    updateCounters();
+});
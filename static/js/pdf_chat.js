@@ -0,0 +1,225 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const uploadForm = document.getElementById('pdf-upload-form');
+    const chatForm = document.getElementById('chat-form');
+    const chatMessages = document.getElementById('chat-messages');
+    const questionInput = document.getElementById('question-input');
+    const sendButton = document.getElementById('send-button');
+    const quickQuestions = document.querySelectorAll('.quick-question');
+
+    // Handle PDF upload
+    uploadForm.addEventListener('submit', async function(e) {
+        e.preventDefault();
+
+        const formData = new FormData(uploadForm);
+        const uploadStatus = document.getElementById('upload-status');
+        const selectedFiles = document.getElementById('pdf-file').files;
+
+        if (selectedFiles.length > 1) {
+            await uploadCollection(selectedFiles, uploadStatus);
+            return;
+        }
+
+        uploadStatus.innerHTML = '<div class="text-info"><i class="fas fa-spinner fa-spin me-2"></i>Uploading PDF...</div>';
+
+        try {
+            const response = await fetch('/pdf-chat', {
+                method: 'POST',
+                body: formData
+            });
+
+            const result = await response.json();
+
+            if (result.success) {
+                uploadStatus.innerHTML = '';
+                document.getElementById('pdf-info').style.display = 'block';
+                questionInput.disabled = false;
+                sendButton.disabled = false;
+
+                // Clear welcome message and show chat started message
+                chatMessages.innerHTML = `
+                    <div class="message assistant-message">
+                        <div class="message-content">
+                            <i class="fas fa-robot me-2"></i>
+                            PDF "${result.filename}" has been uploaded successfully! I'm ready to answer your questions about it.
+                        </div>
+                    </div>
+                `;
+
+                // Auto-scroll to bottom
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else {
+                uploadStatus.innerHTML = `<div class="alert alert-danger">${result.error}</div>`;
+            }
+        } catch (error) {
+            uploadStatus.innerHTML = `<div class="alert alert-danger">Error uploading PDF: ${error.message}</div>`;
+        }
+    });
+
+    // Upload several PDFs as one collection and poll ingestion progress
+    async function uploadCollection(files, uploadStatus) {
+        const formData = new FormData();
+        for (const file of files) {
+            formData.append('files', file);
+        }
+
+        uploadStatus.innerHTML = `<div class="text-info"><i class="fas fa-spinner fa-spin me-2"></i>Uploading ${files.length} PDFs...</div>`;
+
+        try {
+            const response = await fetch('/pdf-chat/upload-multiple', {
+                method: 'POST',
+                body: formData
+            });
+
+            const contentType = response.headers.get('Content-Type') || '';
+            const result = contentType.includes('application/json')
+                ? await response.json()
+                : { success: false, error: `Upload failed (HTTP ${response.status})` };
+
+            if (!result.success) {
+                uploadStatus.innerHTML = `<div class="alert alert-danger">${result.error}</div>`;
+                return;
+            }
+
+            renderProgress(result.files, uploadStatus);
+            document.getElementById('pdf-info').style.display = 'block';
+            questionInput.disabled = false;
+            sendButton.disabled = false;
+
+            chatMessages.innerHTML = `
+                <div class="message assistant-message">
+                    <div class="message-content">
+                        <i class="fas fa-robot me-2"></i>
+                        ${result.files.length} PDFs have been uploaded! I'm indexing them now and can already answer questions across the whole collection.
+                    </div>
+                </div>
+            `;
+
+            const poll = setInterval(async () => {
+                try {
+                    const progressResponse = await fetch('/pdf-chat/collection');
+                    const progress = await progressResponse.json();
+                    if (progress.files) {
+                        renderProgress(progress.files, uploadStatus);
+                    }
+                    if (progress.ready || progress.error) {
+                        clearInterval(poll);
+                    }
+                } catch (error) {
+                    clearInterval(poll);
+                }
+            }, 1000);
+        } catch (error) {
+            uploadStatus.innerHTML = `<div class="alert alert-danger">Error uploading PDFs: ${error.message}</div>`;
+        }
+    }
+
+    function renderProgress(files, uploadStatus) {
+        uploadStatus.innerHTML = files.map(file => {
+            const pages = file.pages ? `${file.indexed_pages}/${file.pages} pages` : '';
+            const icon = file.status === 'ready' ? 'fa-check-circle text-success'
+                : file.status === 'error' ? 'fa-exclamation-triangle text-danger'
+                : 'fa-spinner fa-spin text-info';
+            return `<div class="small"><i class="fas ${icon} me-2"></i>${file.filename} <span class="text-muted">${file.error || pages}</span></div>`;
+        }).join('');
+    }
+
+    // Handle chat
+    chatForm.addEventListener('submit', async function(e) {
+        e.preventDefault();
+
+        const question = questionInput.value.trim();
+        if (!question) return;
+
+        // Add user message
+        addMessage(question, 'user');
+        questionInput.value = '';
+
+        // Show typing indicator
+        const typingId = addTypingIndicator();
+
+        try {
+            const formData = new FormData(chatForm);
+            formData.set('question', question);
+
+            const response = await fetch('/pdf-chat', {
+                method: 'POST',
+                body: formData
+            });
+
+            const result = await response.json();
+
+            // Remove typing indicator
+            removeTypingIndicator(typingId);
+
+            if (result.answer) {
+                addMessage(result.answer, 'assistant');
+            } else {
+                addMessage(result.error || 'Sorry, I could not process your question.', 'error');
+            }
+        } catch (error) {
+            removeTypingIndicator(typingId);
+            addMessage(`Error: ${error.message}`, 'error');
+        }
+    });
+
+    // Handle quick questions
+    quickQuestions.forEach(button => {
+        button.addEventListener('click', function() {
+            if (!questionInput.disabled) {
+                questionInput.value = this.dataset.question;
+                questionInput.focus();
+            }
+        });
+    });
+
+    function addMessage(content, type) {
+        const messageDiv = document.createElement('div');
+        messageDiv.className = `message ${type}-message`;
+
+        let icon = '';
+        if (type === 'user') {
+            icon = '<i class="fas fa-user me-2"></i>';
+        } else if (type === 'assistant') {
+            icon = '<i class="fas fa-robot me-2"></i>';
+        } else if (type === 'error') {
+            icon = '<i class="fas fa-exclamation-triangle me-2"></i>';
+        }
+
+        messageDiv.innerHTML = `
+            <div class="message-content">
+                ${icon}${content.replace(/\n/g, '<br>')}
+            </div>
+            <div class="message-time">${new Date().toLocaleTimeString()}</div>
+        `;
+
+        chatMessages.appendChild(messageDiv);
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    }
+
+    function addTypingIndicator() {
+        const typingId = 'typing-' + Date.now();
+        const typingDiv = document.createElement('div');
+        typingDiv.id = typingId;
+        typingDiv.className = 'message assistant-message';
+        typingDiv.innerHTML = `
+            <div class="message-content">
+                <i class="fas fa-robot me-2"></i>
+                <span class="typing-indicator">
+                    <span></span><span></span><span></span>
+                </span>
+            </div>
+        `;
+
+        chatMessages.appendChild(typingDiv);
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+
+        return typingId;
+    }
+
+    function removeTypingIndicator(typingId) {
+        const typingDiv = document.getElementById(typingId);
+        if (typingDiv) {
+            typingDiv.remove();
+        }
+    }
+});
@@ -1,7 +1,17 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from ai_services.openai_service import OpenAIService
 from ai_services.gemini_service import GeminiService
 from ai_services.groq_service import GroqService
+from tools.code_splitter import split_code, group_units, detect_language, comment
+from ai_services.usage import bind_usage_context
+
+ANALYSIS_ASPECTS = ('explain', 'review', 'optimize')
+MAX_CODE_LENGTH = 20000
+# Code longer than this is reviewed unit by unit
+SPLIT_REVIEW_THRESHOLD = 8000
+MAX_REVIEW_WORKERS = 6
+MAX_HEADER_LENGTH = 1500
 
 class CodeAssistantTool:
     def __init__(self):
@@ -27,6 +37,59 @@ class CodeAssistantTool:
             self.logger.error(f"Error reviewing code: {e}")
             raise Exception(f"Failed to review code: {e}")
     
+    def review_code_by_units(self, code, api_keys, language=None):
+        """Review a large file by splitting it into functions/classes.
+
+        Units are reviewed in parallel, each with a short shared header
+        (imports, module-level declarations and the names of the other units), and
+        the findings are merged into a single report.
+        """
+        services = self._get_available_services(api_keys)
+        language = detect_language(code, language)
+        header, units = split_code(code, language)
+        groups = group_units(units)
+        # Oversize classes and wrapper blocks are split into their members,
+        # so a single group means the whole file fits in one review
+        if len(groups) <= 1:
+            return self.review_code(self.prepare_code(code, language=language), api_keys)
+        
+        if len(header) > MAX_HEADER_LENGTH:
+            header = header[:MAX_HEADER_LENGTH] + "\n" + comment("... [header truncated]", language)
+        outline = ", ".join(unit.name for unit in units)
+        
+        def review_group(group, service):
+            context = group.context
+            if len(context) > MAX_HEADER_LENGTH:
+                context = context[:MAX_HEADER_LENGTH] + "\n" + comment("... [context truncated]", language)
+            parts = [comment(f"Shared context (other definitions in this file: {outline})", language), header]
+            if context:
+                parts += ["", comment("Enclosing definition of the unit under review", language), context]
+            parts += ["", comment(f"Unit under review: {group.label}", language), self.prepare_code(group.code, language=language)]
+            return service.review_code("\n".join(parts))
+        
+        sections = [None] * len(groups)
+        with ThreadPoolExecutor(max_workers=min(len(groups), MAX_REVIEW_WORKERS)) as executor:
+            futures = {}
+            for i, group in enumerate(groups):
+                _, service = services[i % len(services)]
+                futures[executor.submit(bind_usage_context(review_group), group, service)] = i
+            
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    sections[i] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error reviewing {groups[i].label}: {e}")
+                    sections[i] = f"_Review failed: {e}_"
+        
+        if all(section.startswith("_Review failed") for section in sections):
+            raise Exception("Failed to review code: every unit review failed")
+        
+        report = [f"# Code Review ({len(units)} units in {len(groups)} parts)"]
+        for group, section in zip(groups, sections):
+            report.append(f"## {group.label}\n\n{section}")
+        return "\n\n".join(report)
+    
     def generate_code(self, description, api_keys, language=None):
         """Generate code based on description"""
         service = self._get_best_service(api_keys)
@@ -45,21 +108,59 @@ class CodeAssistantTool:
         """Optimize code for better performance"""
         service = self._get_best_service(api_keys)
         
-        prompt = f"Please optimize the following code for better performance, readability, and maintainability:\n\n```\n{code}\n```"
-        
         try:
-            if isinstance(service, OpenAIService):
-                messages = [{"role": "user", "content": prompt}]
-                return service.chat_completion(messages)
-            elif isinstance(service, GeminiService):
-                return service.generate_content(prompt)
-            elif isinstance(service, GroqService):
-                messages = [{"role": "user", "content": prompt}]
-                return service.chat_completion(messages)
+            return service.optimize_code(code)
         except Exception as e:
             self.logger.error(f"Error optimizing code: {e}")
             raise Exception(f"Failed to optimize code: {e}")
     
+    def analyze_code(self, code, api_keys, language=None):
+        """Explain, review and optimize code concurrently.
+
+        Yields one dict per aspect (``aspect``, ``provider`` and either
+        ``result`` or ``error``) in the order the calls finish.
+        """
+        services = self._get_available_services(api_keys)
+        return self._run_analysis(self.prepare_code(code, language=language), services)
+    
+    def _run_analysis(self, code, services):
+        # Spread the aspects across providers so no single key takes all three
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=len(ANALYSIS_ASPECTS)) as executor:
+            for i, aspect in enumerate(ANALYSIS_ASPECTS):
+                provider, service = services[i % len(services)]
+                future = executor.submit(bind_usage_context(getattr(service, f"{aspect}_code")), code)
+                jobs[future] = (aspect, provider)
+            
+            for future in as_completed(jobs):
+                aspect, provider = jobs[future]
+                try:
+                    yield {'aspect': aspect, 'provider': provider, 'result': future.result()}
+                except Exception as e:
+                    self.logger.error(f"Error running {aspect} with {provider}: {e}")
+                    yield {'aspect': aspect, 'provider': provider, 'error': f"Failed to {aspect} code: {e}"}
+    
+    def prepare_code(self, code, max_length=MAX_CODE_LENGTH, language=None):
+        """Normalize and trim code once so every prompt shares the same copy"""
+        lines = [line.rstrip() for line in code.expandtabs(4).strip('\n').splitlines()]
+        code = "\n".join(lines)
+        if len(code) > max_length:
+            code = code[:max_length] + "\n" + comment("... [code truncated]", detect_language(code, language))
+        return code
+    
+    def _get_available_services(self, api_keys):
+        """Get all configured AI services in order of coding capability"""
+        services = []
+        if 'openai' in api_keys:
+            services.append(('openai', OpenAIService(api_keys['openai'])))
+        if 'groq' in api_keys:
+            services.append(('groq', GroqService(api_keys['groq'])))
+        if 'gemini' in api_keys:
+            services.append(('gemini', GeminiService(api_keys['gemini'])))
+        if not services:
+            raise Exception("No AI service available. Please configure API keys.")
+        return services
+    
     def _get_best_service(self, api_keys):
         """Get the best available AI service for code tasks"""
         # Prefer services in order of coding capability
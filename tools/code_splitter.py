@@ -0,0 +1,294 @@
+import ast
+import re
+
+# Top-level definition starts for the non-Python languages we support
+DEFINITION_RE = re.compile(
+    r"^(export\s+)?(default\s+)?(public|private|protected|internal|static|final|abstract|async|pub|open|override|\s)*"
+    r"(function|class|interface|struct|enum|trait|impl|def|func|fn|module|object|type|namespace|sub|CREATE)\b"
+    r"|^[A-Za-z_][\w<>\[\],\s\*&:]*\s+[\*&]?[A-Za-z_][\w:]*\s*\([^;]*$",
+    re.IGNORECASE,
+)
+
+DEFINITION_KEYWORDS = {
+    'function', 'class', 'interface', 'struct', 'enum', 'trait', 'impl', 'def',
+    'func', 'fn', 'module', 'object', 'type', 'namespace', 'sub',
+}
+
+# Units longer than this are split into their members (methods, statements)
+MAX_UNIT_LENGTH = 6000
+
+# Longer module-level assignments are reviewed rather than kept as header
+MAX_HEADER_STATEMENT_LENGTH = 200
+
+HASH_COMMENT_LANGUAGES = {'python', 'ruby', 'shell/bash', 'powershell'}
+COMMENT_PREFIXES = ('//', '/*', '*', '#', '--')
+
+class CodeUnit:
+    """A contiguous chunk of a source file.
+
+    ``context`` holds the enclosing signature (e.g. the class line) for
+    units split out of a larger definition.
+    """
+
+    def __init__(self, name, kind, start_line, end_line, code, context=""):
+        self.name = name
+        self.kind = kind
+        self.start_line = start_line
+        self.end_line = end_line
+        self.code = code
+        self.context = context
+
+    @property
+    def label(self):
+        return f"{self.kind} {self.name} (lines {self.start_line}-{self.end_line})"
+
+def detect_language(code, language=None):
+    """Return the given language, or 'Python' if the code parses as Python"""
+    if language:
+        return language
+    try:
+        ast.parse(code)
+        return 'Python'
+    except SyntaxError:
+        return None
+
+def comment(text, language=None):
+    """Render text as a single-line comment in the given language"""
+    lang = (language or '').lower()
+    if lang in HASH_COMMENT_LANGUAGES:
+        return f"# {text}"
+    if lang == 'sql':
+        return f"-- {text}"
+    if lang == 'html':
+        return f"<!-- {text} -->"
+    if lang == 'css':
+        return f"/* {text} */"
+    return f"// {text}"
+
+def split_code(code, language=None, max_unit_length=MAX_UNIT_LENGTH):
+    """Split source into a shared header and units.
+
+    Python is split with ``ast``; other languages (or Python that does not
+    parse) fall back to a brace/indentation heuristic. Units longer than
+    ``max_unit_length`` are split again into their members.
+    """
+    if not language or language.lower() == 'python':
+        try:
+            return _split_python(code, max_unit_length)
+        except SyntaxError:
+            pass
+    return _split_heuristic(code, max_unit_length)
+
+def _node_start(node):
+    if getattr(node, 'decorator_list', None):
+        return min(d.lineno for d in node.decorator_list)
+    return node.lineno
+
+def _is_header_statement(node, source):
+    """Imports, docstrings and short assignments serve as shared context"""
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return True
+    if isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+        return True
+    return isinstance(node, (ast.Assign, ast.AnnAssign)) and len(source) <= MAX_HEADER_STATEMENT_LENGTH
+
+def _statement_units(pieces, lines, max_unit_length, name, context=""):
+    """Pack a run of statements into units, descending into oversize compound statements.
+
+    ``pieces`` are ``(start_line, end_line, node)`` tuples; a compound
+    statement that is too long (e.g. an ``if __name__ == '__main__':``
+    block) is split into its child statements, with its own header line
+    as their context.
+    """
+    units = []
+    run = []
+    run_length = 0
+
+    def flush():
+        if run:
+            start, end = run[0][0], run[-1][1]
+            units.append(CodeUnit(name, 'module', start, end, "\n".join(lines[start - 1:end]), context))
+            run.clear()
+
+    for start, end, node in pieces:
+        length = len("\n".join(lines[start - 1:end])) + 1
+        children = [child for child in ast.iter_child_nodes(node)
+                    if isinstance(child, (ast.stmt, ast.excepthandler))]
+        if length > max_unit_length and children:
+            flush()
+            run_length = 0
+            first = _node_start(children[0])
+            signature = "\n".join(lines[start - 1:first - 1]).rstrip()
+            # Lines between children (else:, except ...:, comments) go with the next child
+            child_pieces = []
+            previous_end = first - 1
+            for child in children:
+                child_pieces.append((previous_end + 1, child.end_lineno, child))
+                previous_end = child.end_lineno
+            inner_context = "\n".join(filter(None, [context, signature]))
+            units.extend(_statement_units(child_pieces, lines, max_unit_length, name, inner_context))
+            continue
+        if run and run_length + length > max_unit_length:
+            flush()
+            run_length = 0
+        run.append((start, end))
+        run_length += length
+    flush()
+    return units
+
+def _python_units(nodes, lines, max_unit_length, prefix="", context=""):
+    """Units for the statements among nodes, plus the lines that form their shared header.
+
+    Definitions become units of their own; other statements that are not
+    header material (module-level logic, ``if __name__`` blocks) are
+    grouped into ``module`` units so that they get reviewed too.
+    """
+    header_lines = []
+    units = []
+    run = []
+
+    def flush():
+        if run:
+            units.extend(_statement_units(list(run), lines, max_unit_length, f"{prefix}<statements>", context))
+            run.clear()
+
+    for node in nodes:
+        start = _node_start(node)
+        source = "\n".join(lines[start - 1:node.end_lineno])
+        if isinstance(node, ast.ClassDef) and len(source) > max_unit_length and node.body:
+            flush()
+            # Review an oversize class member by member, with its signature
+            # and class-level declarations as context
+            body_start = _node_start(node.body[0])
+            signature = "\n".join(lines[start - 1:body_start - 1])
+            members, class_lines = _python_units(
+                node.body, lines, max_unit_length, f"{prefix}{node.name}.", context
+            )
+            class_context = "\n".join(filter(None, [context, signature, "\n".join(class_lines)]))
+            for member in members:
+                member.context = "\n".join(filter(None, [class_context, member.context[len(context):].strip()]))
+            units.extend(members)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            flush()
+            kind = 'class' if isinstance(node, ast.ClassDef) else 'function'
+            units.append(CodeUnit(f"{prefix}{node.name}", kind, start, node.end_lineno, source, context))
+        elif _is_header_statement(node, source):
+            flush()
+            header_lines.extend(lines[start - 1:node.end_lineno])
+        else:
+            run.append((start, node.end_lineno, node))
+    flush()
+    return units, header_lines
+
+def _split_python(code, max_unit_length=MAX_UNIT_LENGTH):
+    tree = ast.parse(code)
+    lines = code.splitlines()
+    units, header_lines = _python_units(tree.body, lines, max_unit_length)
+    return "\n".join(header_lines), units
+
+def _unit_name(first):
+    tokens = [t for t in re.split(r"[\s({:=<]", first.split('(')[0]) if t]
+    keywords = [i for i, t in enumerate(tokens) if t.lower() in DEFINITION_KEYWORDS]
+    if keywords and keywords[0] + 1 < len(tokens):
+        return tokens[keywords[0] + 1]
+    return tokens[-1] if tokens else first[:40]
+
+def _split_block(lines, first_line, max_unit_length, context=""):
+    """Split an oversize brace block into the statements of its body.
+
+    ``lines`` is the block's source and ``first_line`` its 1-based line
+    number in the file. The block's opening line becomes the context of
+    the pieces; pieces that are still too long are split again.
+    """
+    code = "\n".join(lines)
+    signature = next((line.strip() for line in lines
+                      if line.strip() and not line.strip().startswith(COMMENT_PREFIXES)), lines[0].strip())
+    whole = CodeUnit(_unit_name(signature), 'block', first_line,
+                     first_line + len(lines) - 1, code, context)
+    if len(code) <= max_unit_length or len(lines) < 3:
+        return [whole]
+
+    depths = []
+    depth = 0
+    for line in lines:
+        depths.append(depth)
+        depth = max(0, depth + line.count('{') - line.count('}'))
+
+    body = [i for i in range(1, len(lines))
+            if lines[i].strip() and not lines[i].strip().startswith(('}', ')', ']'))]
+    if not body:
+        return [whole]
+    body_depth = min(depths[i] for i in body)
+    boundaries = [i for i in body
+                  if depths[i] == body_depth and not lines[i].strip().startswith(COMMENT_PREFIXES)]
+    if body_depth == 0 or not boundaries:
+        return [whole]
+    # Leading comments belong to the statement they describe
+    for n, start in enumerate(boundaries):
+        floor = boundaries[n - 1] + 1 if n else 1
+        while start > floor and lines[start - 1].strip().startswith(COMMENT_PREFIXES):
+            start -= 1
+        boundaries[n] = start
+
+    inner_context = "\n".join(filter(None, [context, lines[0].rstrip()]))
+    units = []
+    if boundaries[0] > 1:
+        boundaries.insert(0, 1)
+    for n, start in enumerate(boundaries):
+        end = boundaries[n + 1] if n + 1 < len(boundaries) else len(lines)
+        while end > start + 1 and not lines[end - 1].strip():
+            end -= 1
+        units.extend(_split_block(lines[start:end], first_line + start, max_unit_length, inner_context))
+    return units
+
+def _split_heuristic(code, max_unit_length=MAX_UNIT_LENGTH):
+    lines = code.splitlines()
+    boundaries = []
+    depth = 0
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if depth == 0 and line[:1] not in (' ', '\t') and DEFINITION_RE.match(stripped):
+            boundaries.append(i)
+        depth = max(0, depth + line.count('{') - line.count('}'))
+
+    if not boundaries:
+        if not code.strip():
+            return "", []
+        # No recognisable definitions (e.g. a script wrapped in one callback)
+        return "", _split_block(lines, 1, max_unit_length)
+
+    header = "\n".join(lines[:boundaries[0]])
+    units = []
+    for n, start in enumerate(boundaries):
+        end = boundaries[n + 1] if n + 1 < len(boundaries) else len(lines)
+        # Trailing blank lines belong to the gap, not the unit
+        while end > start + 1 and not lines[end - 1].strip():
+            end -= 1
+        units.extend(_split_block(lines[start:end], start + 1, max_unit_length))
+    return header, units
+
+def group_units(units, target_length=6000):
+    """Merge small adjacent units so each review call carries a useful amount of code"""
+    groups = []
+    current = []
+    length = 0
+    for unit in units:
+        if current and length + len(unit.code) > target_length:
+            groups.append(_merge(current))
+            current, length = [], 0
+        current.append(unit)
+        length += len(unit.code)
+    if current:
+        groups.append(_merge(current))
+    return groups
+
+def _merge(units):
+    if len(units) == 1:
+        return units[0]
+    names = ", ".join(u.name for u in units)
+    contexts = []
+    for unit in units:
+        if unit.context and unit.context not in contexts:
+            contexts.append(unit.context)
+    return CodeUnit(names, 'units', units[0].start_line, units[-1].end_line,
+                    "\n\n".join(u.code for u in units), "\n".join(contexts))
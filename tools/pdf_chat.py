@@ -1,8 +1,38 @@
 import PyPDF2
+import hashlib
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from ai_services.openai_service import OpenAIService
 from ai_services.gemini_service import GeminiService
 from ai_services.groq_service import GroqService
+from tools.pdf_document import PDFDocument, PDFCollection, get_document, get_collection, forget_document, forget_collection
+
+PDF_SYSTEM_PROMPT = "You answer questions about a PDF document accurately and comprehensively, using only the PDF content provided."
+
+# The prefix is identical for every question on a document and is what
+# providers cache; excerpts are retrieved per question from the remaining pages.
+PREFIX_CONTENT_LENGTH = 16000
+PREFIX_MAX_PAGES = 20
+EXCERPT_CONTENT_LENGTH = 6000
+
+# Bounded pools shared by all requests for multi-file ingestion: threads
+# track each file, text extraction itself runs in worker processes since
+# PyPDF2 holds the GIL. forkserver avoids forking this multi-threaded process.
+MAX_INGEST_WORKERS = 4
+_ingest_executor = ThreadPoolExecutor(max_workers=MAX_INGEST_WORKERS, thread_name_prefix="pdf-ingest")
+_extract_executor = None
+_extract_lock = threading.Lock()
+
+def _get_extract_executor():
+    """Process pool for page extraction, created on first use and replaced if a worker died"""
+    global _extract_executor
+    with _extract_lock:
+        if _extract_executor is None or getattr(_extract_executor, '_broken', False):
+            _extract_executor = ProcessPoolExecutor(max_workers=MAX_INGEST_WORKERS,
+                                                    mp_context=multiprocessing.get_context("forkserver"))
+        return _extract_executor
 
 class PDFChatTool:
     def __init__(self):
@@ -24,8 +54,30 @@ class PDFChatTool:
             self.logger.error(f"Error extracting PDF text: {e}")
             raise Exception(f"Failed to extract text from PDF: {e}")
     
+    def open_document(self, file_path, replace=False):
+        """Open a PDF lazily and start indexing its pages in the background"""
+        try:
+            if replace:
+                forget_document(file_path)
+            document = get_document(file_path)
+            document.start_background_indexing()
+            return document
+        except Exception as e:
+            self.logger.error(f"Error opening PDF: {e}")
+            raise Exception(f"Failed to open PDF: {e}")
+    
+    def open_collection(self, file_paths, replace=False):
+        """Ingest several PDFs concurrently as one queryable collection"""
+        if replace:
+            forget_collection(file_paths)
+            for file_path in file_paths:
+                forget_document(file_path)
+        collection = get_collection(file_paths)
+        collection.start_ingestion(_ingest_executor, _get_extract_executor())
+        return collection
+    
     def ask_question(self, question, pdf_content, api_keys):
-        """Ask a question about the PDF content"""
+        """Ask a question about the PDF content (text, PDFDocument or PDFCollection)"""
         # Try different AI services based on available API keys
         services = []
         
@@ -42,28 +94,44 @@ class PDFChatTool:
         # Use the first available service
         service = services[0]
         
-        # Truncate PDF content if too long (to avoid token limits)
-        max_content_length = 8000  # Adjust based on model limits
-        if len(pdf_content) > max_content_length:
-            pdf_content = pdf_content[:max_content_length] + "...\n[Content truncated]"
+        # Stable document prefix first, variable excerpts and question last,
+        # so providers can reuse their cached processing of the prefix
+        if isinstance(pdf_content, (PDFDocument, PDFCollection)):
+            document_context, covered = pdf_content.stable_context(max_length=PREFIX_CONTENT_LENGTH,
+                                                                    max_pages=PREFIX_MAX_PAGES)
+            excerpts = pdf_content.build_context(question, max_length=EXCERPT_CONTENT_LENGTH, exclude=covered)
+            cache_id = f"pdf-{pdf_content.fingerprint}"
+        else:
+            # Truncate PDF content if too long (to avoid token limits)
+            document_context = pdf_content
+            if len(document_context) > PREFIX_CONTENT_LENGTH:
+                document_context = document_context[:PREFIX_CONTENT_LENGTH] + "...\n[Content truncated]"
+            excerpts = ""
+            cache_id = f"pdf-{hashlib.sha256(document_context.encode('utf-8')).hexdigest()[:16]}"
         
-        prompt = f"""Based on the following PDF content, please answer the question accurately and comprehensively.
-
-PDF Content:
-{pdf_content}
-
-Question: {question}
+        context = f"PDF Content:\n{document_context}"
+        prompt = ""
+        if excerpts:
+            prompt += f"Additional relevant excerpts from the PDF:\n{excerpts}\n\n"
+        prompt += f"""Question: {question}
 
 Please provide a detailed answer based only on the information available in the PDF content. If the information is not available in the PDF, please state that clearly."""
 
         try:
             if isinstance(service, OpenAIService):
-                messages = [{"role": "user", "content": prompt}]
-                return service.chat_completion(messages)
+                messages = [
+                    {"role": "system", "content": f"{PDF_SYSTEM_PROMPT}\n\n{context}"},
+                    {"role": "user", "content": prompt}
+                ]
+                # Routes requests for the same document to the same prompt cache
+                return service.chat_completion(messages, extra_body={"prompt_cache_key": cache_id})
             elif isinstance(service, GeminiService):
-                return service.generate_content(prompt)
+                return service.generate_with_context_cache(PDF_SYSTEM_PROMPT, context, prompt, cache_id)
             elif isinstance(service, GroqService):
-                messages = [{"role": "user", "content": prompt}]
+                messages = [
+                    {"role": "system", "content": f"{PDF_SYSTEM_PROMPT}\n\n{context}"},
+                    {"role": "user", "content": prompt}
+                ]
                 return service.chat_completion(messages)
         except Exception as e:
             self.logger.error(f"Error generating answer: {e}")
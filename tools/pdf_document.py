@@ -0,0 +1,505 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+def tokenize(text):
+    """Lowercase word tokens used for page indexing and retrieval"""
+    return _WORD_RE.findall(text.lower())
+
+def extract_pages(file_path, keep_text=32, max_resolved_objects=2000):
+    """Extract and tokenize every page of a PDF.
+
+    Meant to run in a worker process: PyPDF2 is pure Python, so threads
+    extracting several files serialize on the GIL. Returns one
+    ``(text, Counter)`` per page; text is only sent back for the first
+    ``keep_text`` pages (None after that) to keep the result small.
+    """
+    pages = []
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for page_num in range(len(reader.pages)):
+            try:
+                text = reader.pages[page_num].extract_text() or ""
+            except Exception as e:
+                logger.error(f"Error indexing page {page_num} of {file_path}: {e}")
+                text = ""
+            pages.append((text if page_num < keep_text else None, Counter(tokenize(text))))
+            resolved = getattr(reader, 'resolved_objects', None)
+            if resolved is not None and len(resolved) > max_resolved_objects:
+                resolved.clear()
+    return pages
+
+class PDFDocument:
+    """Lazily extracted PDF.
+
+    Opening the document only parses the page tree. Page text is extracted
+    and indexed on demand or by a background worker, and only a bounded
+    number of page texts is kept in memory at once.
+    """
+
+    def __init__(self, file_path, max_cached_pages=32, max_resolved_objects=2000):
+        self.file_path = file_path
+        self.max_cached_pages = max_cached_pages
+        self.max_resolved_objects = max_resolved_objects
+        self._lock = threading.RLock()
+        self._file = open(file_path, 'rb')
+        try:
+            self._reader = PyPDF2.PdfReader(self._file)
+            self.page_count = len(self._reader.pages)
+        except Exception:
+            self._file.close()
+            raise
+        self._texts = OrderedDict()  # page_num -> text, LRU order
+        self._index = {}  # page_num -> Counter of tokens
+        self._pending = list(range(self.page_count))
+        self._worker = None
+        self._closed = False
+        self._prefixes = {}  # (max_length, max_pages) -> (text, pages)
+        stat = os.stat(file_path)
+        self.fingerprint = hashlib.sha256(
+            f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8')
+        ).hexdigest()[:16]
+
+    def _extract_page(self, page_num):
+        """Extract a single page and drop the parsed objects it pulled in"""
+        with self._lock:
+            page = self._reader.pages[page_num]
+            text = page.extract_text() or ""
+            del page
+            # PyPDF2 caches every resolved object; reset it so parsed
+            # content streams don't accumulate over a long document.
+            resolved = getattr(self._reader, 'resolved_objects', None)
+            if resolved is not None and len(resolved) > self.max_resolved_objects:
+                resolved.clear()
+            return text
+
+    def _remember(self, page_num, text):
+        self._texts[page_num] = text
+        self._texts.move_to_end(page_num)
+        while len(self._texts) > self.max_cached_pages:
+            self._texts.popitem(last=False)
+
+    def get_page_text(self, page_num):
+        """Return the text of a page, extracting and indexing it if needed"""
+        if page_num < 0 or page_num >= self.page_count:
+            raise IndexError(f"Page {page_num} out of range")
+        with self._lock:
+            if page_num in self._texts:
+                self._texts.move_to_end(page_num)
+                return self._texts[page_num]
+            text = self._extract_page(page_num)
+            self._index[page_num] = Counter(tokenize(text))
+            if page_num in self._pending:
+                self._pending.remove(page_num)
+            self._remember(page_num, text)
+            return text
+
+    def load_index(self, pages):
+        """Adopt pages extracted elsewhere, as returned by ``extract_pages``"""
+        with self._lock:
+            if self._closed or len(pages) != self.page_count:
+                return
+            for page_num, (text, counter) in enumerate(pages):
+                if page_num in self._index:
+                    continue
+                self._index[page_num] = counter
+                if text is not None and len(self._texts) < self.max_cached_pages:
+                    self._remember(page_num, text)
+            self._pending = [p for p in self._pending if p not in self._index]
+
+    def is_indexed(self, page_num):
+        return page_num in self._index
+
+    @property
+    def indexed_count(self):
+        return len(self._index)
+
+    @property
+    def fully_indexed(self):
+        return len(self._index) == self.page_count
+
+    def prioritize(self, page_nums):
+        """Move pages to the front of the background indexing queue"""
+        with self._lock:
+            front = [p for p in page_nums if p in self._pending]
+            self._pending = front + [p for p in self._pending if p not in front]
+
+    def start_background_indexing(self):
+        """Index remaining pages on a daemon thread"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._index_pending, daemon=True)
+            self._worker.start()
+
+    def _index_pending(self):
+        self.index_pending()
+
+    def index_pending(self):
+        """Index every remaining page on the calling thread"""
+        while True:
+            with self._lock:
+                if self._closed or not self._pending:
+                    return
+                page_num = self._pending[0]
+                try:
+                    self.get_page_text(page_num)
+                except Exception as e:
+                    logger.error(f"Error indexing page {page_num} of {self.file_path}: {e}")
+                    self._pending.remove(page_num)
+                    self._index[page_num] = Counter()
+
+    def score_pages(self, query):
+        """Return (score, page_num) for indexed pages matching the query"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            index = list(self._index.items())
+        doc_freq = Counter()
+        for _, counts in index:
+            doc_freq.update(t for t in terms if t in counts)
+        scored = []
+        for page_num, counts in index:
+            score = sum(counts[t] / doc_freq[t] for t in terms if counts[t])
+            if score:
+                scored.append((score, page_num))
+        return scored
+
+    def search(self, query, limit=5):
+        """Rank indexed pages by term overlap with the query"""
+        scored = sorted(self.score_pages(query), key=lambda item: (-item[0], item[1]))
+        return [page_num for _, page_num in scored[:limit]]
+
+    def stable_context(self, max_length=16000, max_pages=20):
+        """Leading pages of the document, identical for every question.
+
+        Returns ``(text, pages)``. Keeping this prefix byte-for-byte stable
+        lets providers reuse their cached processing of it. Only whole pages
+        are included, so every page in ``pages`` is fully covered. At most
+        ``max_pages`` pages are extracted, so scanned documents with little
+        text don't stall the first answer.
+        """
+        with self._lock:
+            prefix = self._prefixes.get((max_length, max_pages))
+        if prefix is not None:
+            return prefix
+
+        parts = []
+        pages = set()
+        length = 0
+        for page_num in range(min(max_pages, self.page_count)):
+            part = f"[Page {page_num + 1}]\n{self.get_page_text(page_num)}"
+            if length + len(part) > max_length:
+                break
+            parts.append(part)
+            pages.add(page_num)
+            length += len(part) + 1
+        text = "\n".join(parts)
+
+        with self._lock:
+            self._prefixes[(max_length, max_pages)] = (text, pages)
+        return text, pages
+
+    def build_context(self, question, max_length=8000, lead_pages=2, exclude=()):
+        """Assemble prompt context for a question from the most relevant pages.
+
+        The first pages are extracted synchronously so there is always some
+        context; everything else comes from pages indexed so far. Pages in
+        ``exclude`` (e.g. already in a stable prefix) are skipped.
+        """
+        for page_num in range(min(lead_pages, self.page_count)):
+            self.get_page_text(page_num)
+
+        pages = [p for p in self.search(question, limit=max(lead_pages, 10) + len(exclude)) if p not in exclude]
+        if pages:
+            # Neighbours of relevant pages are the likeliest to matter next
+            self.prioritize([p + d for p in pages for d in (-1, 1)])
+        elif not exclude:
+            pages = list(range(self.page_count))
+
+        selected = []
+        length = 0
+        for page_num in pages:
+            if length >= max_length:
+                break
+            text = self.get_page_text(page_num)
+            selected.append((page_num, text))
+            length += len(text)
+
+        selected.sort()
+        context = "\n".join(f"[Page {page_num + 1}]\n{text}" for page_num, text in selected)
+        if len(context) > max_length:
+            context = context[:max_length] + "...\n[Content truncated]"
+        if not self.fully_indexed:
+            self.start_background_indexing()
+        return context
+
+    def get_text(self):
+        """Extract the full document text (blocking)"""
+        return "\n".join(self.get_page_text(p) for p in range(self.page_count)).strip()
+
+    def stop(self):
+        """Stop background indexing; the document stays readable"""
+        self._closed = True
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._file.close()
+
+_documents = OrderedDict()
+_documents_lock = threading.Lock()
+MAX_OPEN_DOCUMENTS = 16
+
+def get_document(file_path):
+    """Return the open document for a path, opening it if necessary"""
+    with _documents_lock:
+        document = _documents.get(file_path)
+        if document is not None:
+            _documents.move_to_end(file_path)
+            return document
+
+    document = PDFDocument(file_path)
+    with _documents_lock:
+        existing = _documents.get(file_path)
+        if existing is not None:
+            document.close()
+            return existing
+        _documents[file_path] = document
+        while len(_documents) > MAX_OPEN_DOCUMENTS:
+            # Requests may still hold the evicted document, so only stop its
+            # worker and let the file handle close when it is collected.
+            _, evicted = _documents.popitem(last=False)
+            evicted.stop()
+    return document
+
+def forget_document(file_path):
+    """Drop an open document, e.g. after the file is replaced.
+
+    Other requests may still hold it, so only stop its worker and let the
+    file handle close when it is collected, as LRU eviction does.
+    """
+    with _documents_lock:
+        document = _documents.pop(file_path, None)
+    if document is not None:
+        document.stop()
+
+class PDFCollection:
+    """A set of PDFs ingested together and queried as one corpus.
+
+    The collection owns its documents rather than borrowing them from the
+    shared LRU, so single-file uploads can't evict and stop them mid-ingest.
+    """
+
+    def __init__(self, file_paths):
+        self.file_paths = list(file_paths)
+        self._lock = threading.Lock()
+        self._status = {path: {'status': 'queued', 'error': None} for path in self.file_paths}
+        self._documents = {}  # file_path -> PDFDocument
+        self._futures = []
+        self._prefix = None  # ((max_length, max_pages), (text, pages))
+
+    def start_ingestion(self, executor, extract_executor=None):
+        """Open and fully index every document on the given executor.
+
+        With an ``extract_executor`` (a process pool), page extraction runs
+        there in parallel and only the resulting index is built here.
+        """
+        with self._lock:
+            if self._futures:
+                return
+            self._futures = [executor.submit(self._ingest, path, extract_executor)
+                             for path in self.file_paths]
+
+    def _set_status(self, file_path, status, error=None):
+        with self._lock:
+            self._status[file_path] = {'status': status, 'error': error}
+
+    def _document(self, file_path):
+        """Open (once) and return the collection's own document for a path"""
+        with self._lock:
+            document = self._documents.get(file_path)
+        if document is not None:
+            return document
+        document = PDFDocument(file_path)
+        with self._lock:
+            return self._documents.setdefault(file_path, document)
+
+    def _ingest(self, file_path, extract_executor=None):
+        self._set_status(file_path, 'indexing')
+        try:
+            document = self._document(file_path)
+            if extract_executor is not None:
+                try:
+                    future = extract_executor.submit(extract_pages, file_path, document.max_cached_pages,
+                                                     document.max_resolved_objects)
+                    document.load_index(future.result())
+                except Exception as e:
+                    # Fall back to extracting on this thread below
+                    logger.error(f"Error extracting {file_path} in worker process: {e}")
+            document.index_pending()
+            if document.fully_indexed:
+                self._set_status(file_path, 'ready')
+            else:
+                self._set_status(file_path, 'error', 'Indexing was interrupted')
+        except Exception as e:
+            logger.error(f"Error ingesting {file_path}: {e}")
+            self._set_status(file_path, 'error', str(e))
+
+    def _all_documents(self):
+        """Every document that can be opened, whatever its ingestion status"""
+        documents = []
+        for file_path in self.file_paths:
+            try:
+                documents.append((file_path, self._document(file_path)))
+            except Exception as e:
+                logger.error(f"Error opening {file_path}: {e}")
+        return documents
+
+    def _open_documents(self):
+        documents = []
+        for file_path in self.file_paths:
+            with self._lock:
+                status = self._status[file_path]['status']
+            if status in ('queued', 'error'):
+                continue
+            documents.append((file_path, self._document(file_path)))
+        return documents
+
+    def stop(self):
+        """Stop indexing every document in the collection"""
+        with self._lock:
+            documents = list(self._documents.values())
+        for document in documents:
+            document.stop()
+
+    def progress(self):
+        """Per-file ingestion progress"""
+        files = []
+        for file_path in self.file_paths:
+            with self._lock:
+                entry = dict(self._status[file_path])
+            entry['filename'] = os.path.basename(file_path)
+            entry['pages'] = None
+            entry['indexed_pages'] = 0
+            if entry['status'] in ('indexing', 'ready'):
+                with self._lock:
+                    document = self._documents.get(file_path)
+                if document is not None:
+                    entry['pages'] = document.page_count
+                    entry['indexed_pages'] = document.indexed_count
+            files.append(entry)
+        return files
+
+    @property
+    def fingerprint(self):
+        # Keyed on every file, not just those ingested so far, so the
+        # provider cache id doesn't change while ingestion is running
+        parts = [document.fingerprint for _, document in self._all_documents()]
+        return hashlib.sha256(":".join(self.file_paths + parts).encode('utf-8')).hexdigest()[:16]
+
+    def stable_context(self, max_length=16000, max_pages=20):
+        """Leading pages of every document, taken round-robin, identical across questions.
+
+        The lead pages are extracted up front from every file, queued or
+        not, so the prefix is the same during and after ingestion. Only
+        whole pages are included, and at most ``max_pages`` in total.
+        """
+        with self._lock:
+            prefix = self._prefix
+            if prefix is not None and prefix[0] == (max_length, max_pages):
+                return prefix[1]
+
+        documents = self._all_documents()
+        parts = []
+        pages = set()
+        length = 0
+        depth = 0
+        full = False
+        while not full and any(depth < d.page_count for _, d in documents):
+            for file_path, document in documents:
+                if depth >= document.page_count:
+                    continue
+                part = f"[{os.path.basename(file_path)}, Page {depth + 1}]\n{document.get_page_text(depth)}"
+                if length + len(part) > max_length or len(pages) >= max_pages:
+                    full = True
+                    break
+                parts.append(part)
+                pages.add((file_path, depth))
+                length += len(part) + 1
+            depth += 1
+        result = ("\n".join(parts), pages)
+
+        with self._lock:
+            self._prefix = ((max_length, max_pages), result)
+        return result
+
+    @property
+    def ready(self):
+        with self._lock:
+            return all(s['status'] in ('ready', 'error') for s in self._status.values())
+
+    def build_context(self, question, max_length=8000, exclude=()):
+        """Assemble prompt context from the best matching pages of all documents"""
+        documents = self._open_documents()
+        scored = []
+        for file_path, document in documents:
+            scored.extend((score, file_path, page_num) for score, page_num in document.score_pages(question))
+        scored.sort(key=lambda item: -item[0])
+        hits = [(file_path, page_num) for _, file_path, page_num in scored
+                if (file_path, page_num) not in exclude]
+        if not hits and not exclude:
+            hits = [(file_path, 0) for file_path, document in documents if document.page_count]
+
+        by_path = dict(documents)
+        selected = []
+        length = 0
+        for file_path, page_num in hits:
+            if length >= max_length:
+                break
+            text = by_path[file_path].get_page_text(page_num)
+            selected.append((self.file_paths.index(file_path), page_num, file_path, text))
+            length += len(text)
+
+        selected.sort()
+        context = "\n".join(
+            f"[{os.path.basename(file_path)}, Page {page_num + 1}]\n{text}"
+            for _, page_num, file_path, text in selected
+        )
+        if len(context) > max_length:
+            context = context[:max_length] + "...\n[Content truncated]"
+        return context
+
+_collections = OrderedDict()
+MAX_OPEN_COLLECTIONS = 16
+
+def get_collection(file_paths):
+    """Return the collection for a set of paths, creating it if necessary"""
+    key = tuple(file_paths)
+    with _documents_lock:
+        collection = _collections.get(key)
+        if collection is None:
+            collection = PDFCollection(file_paths)
+            _collections[key] = collection
+            while len(_collections) > MAX_OPEN_COLLECTIONS:
+                _, evicted = _collections.popitem(last=False)
+                evicted.stop()
+        else:
+            _collections.move_to_end(key)
+        return collection
+
+def forget_collection(file_paths):
+    """Drop a collection so its documents are ingested again"""
+    with _documents_lock:
+        collection = _collections.pop(tuple(file_paths), None)
+    if collection is not None:
+        collection.stop()
@@ -0,0 +1,162 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ai_services.openai_service import OpenAIService
+from ai_services.gemini_service import GeminiService
+from ai_services.groq_service import GroqService
+from ai_services.usage import bind_usage_context
+
+# Rough input budget per request; ~4 characters per token
+BATCH_TOKEN_BUDGET = 3000
+MAX_BATCH_ITEMS = 50
+MAX_ITEM_CHARS = 2000
+MAX_RETRIES = 2
+MAX_BATCH_WORKERS = 4
+
+SENTIMENT_INSTRUCTIONS = (
+    "You are a sentiment analysis expert. For every item in the JSON array below, "
+    "rate the sentiment of its text from 1 (very negative) to 5 (very positive), "
+    "give a confidence score between 0 and 1, and a label of negative, neutral or positive. "
+    "Respond with a JSON object in exactly this format, with one entry per input id: "
+    '{"results": [{"id": number, "rating": number, "confidence": number, "label": string}]}'
+)
+
+LABELS = ('negative', 'neutral', 'positive')
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+class SentimentAnalysisTool:
+    """Batched sentiment analysis over many short texts.
+
+    Texts are packed into as few structured-JSON requests as the token
+    budget allows, results are validated per item, and only items that
+    came back missing or malformed are retried.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def analyze(self, text, api_keys):
+        """Analyze a single text; returns {'rating', 'confidence', 'label'}"""
+        for result in self.analyze_batch([text], api_keys):
+            if 'error' in result:
+                raise Exception(f"Failed to analyze sentiment: {result['error']}")
+            return {k: result[k] for k in ('rating', 'confidence', 'label')}
+        raise Exception("Failed to analyze sentiment: no result")
+
+    def analyze_batch(self, texts, api_keys, provider_preference=None):
+        """Analyze many texts, yielding one result dict per text as batches finish.
+
+        Each result carries the text's ``index`` and either ``rating``,
+        ``confidence`` and ``label`` or an ``error``.
+        """
+        services = self._get_available_services(api_keys, provider_preference)
+        items = {i: (text or "")[:MAX_ITEM_CHARS] for i, text in enumerate(texts)}
+        return self._run_batches(items, services)
+
+    def _run_batches(self, items, services):
+        pending = list(items)
+        attempt = 0
+        with ThreadPoolExecutor(max_workers=MAX_BATCH_WORKERS) as executor:
+            while pending and attempt <= MAX_RETRIES:
+                batches = self._pack(pending, items)
+                futures = {}
+                for n, batch in enumerate(batches):
+                    # Rotate providers between batches and between retries
+                    provider, service = services[(n + attempt) % len(services)]
+                    future = executor.submit(bind_usage_context(self._analyze_batch), batch, items, service)
+                    futures[future] = (batch, provider)
+
+                failed = []
+                for future in as_completed(futures):
+                    batch, provider = futures[future]
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Sentiment batch of {len(batch)} failed on {provider}: {e}")
+                        results = {}
+                    for index in batch:
+                        if index in results:
+                            yield dict(results[index], index=index, provider=provider)
+                        else:
+                            failed.append(index)
+                pending = sorted(failed)
+                attempt += 1
+
+        for index in pending:
+            yield {'index': index, 'error': 'No valid sentiment returned'}
+
+    def _pack(self, indexes, items):
+        """Group item indexes into batches within the token and item budgets"""
+        batches = []
+        current = []
+        tokens = estimate_tokens(SENTIMENT_INSTRUCTIONS)
+        for index in indexes:
+            item_tokens = estimate_tokens(items[index]) + 10
+            if current and (tokens + item_tokens > BATCH_TOKEN_BUDGET or len(current) >= MAX_BATCH_ITEMS):
+                batches.append(current)
+                current = []
+                tokens = estimate_tokens(SENTIMENT_INSTRUCTIONS)
+            current.append(index)
+            tokens += item_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _analyze_batch(self, batch, items, service):
+        payload = json.dumps([{"id": index, "text": items[index]} for index in batch], ensure_ascii=False)
+
+        if isinstance(service, GeminiService):
+            content = service.generate_content(
+                f"{SENTIMENT_INSTRUCTIONS}\n\n{payload}",
+                response_mime_type="application/json"
+            )
+        else:
+            messages = [
+                {"role": "system", "content": SENTIMENT_INSTRUCTIONS},
+                {"role": "user", "content": payload},
+            ]
+            content = service.chat_completion(messages, response_format={"type": "json_object"})
+
+        return self._parse_results(content, set(batch))
+
+    def _parse_results(self, content, expected):
+        """Validate a structured response, keeping only well-formed expected items"""
+        if not content:
+            return {}
+        data = json.loads(content)
+        entries = data.get("results", []) if isinstance(data, dict) else data
+
+        results = {}
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                index = int(entry["id"])
+                rating = max(1, min(5, round(float(entry["rating"]))))
+                confidence = max(0, min(1, float(entry["confidence"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if index not in expected:
+                continue
+            label = str(entry.get("label", "")).lower()
+            if label not in LABELS:
+                label = LABELS[0] if rating <= 2 else LABELS[2] if rating >= 4 else LABELS[1]
+            results[index] = {'rating': rating, 'confidence': confidence, 'label': label}
+        return results
+
+    def _get_available_services(self, api_keys, provider_preference=None):
+        """Get configured services, or only the preferred provider if one is given"""
+        services = []
+        if 'openai' in api_keys:
+            services.append(('openai', OpenAIService(api_keys['openai'])))
+        if 'gemini' in api_keys:
+            services.append(('gemini', GeminiService(api_keys['gemini'])))
+        if 'groq' in api_keys:
+            services.append(('groq', GroqService(api_keys['groq'])))
+        if provider_preference:
+            services = [item for item in services if item[0] == provider_preference]
+            if not services:
+                raise Exception(f"Requested provider '{provider_preference}' is not configured.")
+        if not services:
+            raise Exception("No AI service available. Please configure API keys.")
+        return services
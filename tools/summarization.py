@@ -55,12 +55,9 @@ class SummarizationTool:
     
     def analyze_sentiment(self, text, api_keys):
         """Analyze sentiment of the text"""
-        if 'openai' in api_keys:
-            service = OpenAIService(api_keys['openai'])
-            try:
-                return service.analyze_sentiment(text)
-            except Exception as e:
-                self.logger.error(f"Error analyzing sentiment: {e}")
-                raise Exception(f"Failed to analyze sentiment: {e}")
-        else:
-            raise Exception("Sentiment analysis requires OpenAI API key.")
+        from tools.sentiment_analysis import SentimentAnalysisTool
+        try:
+            return SentimentAnalysisTool().analyze(text, api_keys)
+        except Exception as e:
+            self.logger.error(f"Error analyzing sentiment: {e}")
+            raise Exception(f"Failed to analyze sentiment: {e}")
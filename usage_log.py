@@ -0,0 +1,115 @@
+import atexit
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert
+from extensions import db
+from ai_services.usage import usage_recorder
+
+logger = logging.getLogger(__name__)
+
+# Approximate USD prices per 1M (input, output) tokens, for the dashboard's
+# cost estimate only. Update when provider pricing changes.
+MODEL_PRICES = {
+    'gpt-5': (1.25, 10.00),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.5-pro': (1.25, 10.00),
+    'llama-3.3-70b-versatile': (0.59, 0.79),
+}
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    input_price, output_price = MODEL_PRICES.get(model, (0, 0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+def _upsert_insert(model):
+    """INSERT ... ON CONFLICT for the current database (PostgreSQL or SQLite)"""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(model)
+
+def flush_usage_events(app, events):
+    """Append a batch of events and fold it into the hourly rollups"""
+    from models import UsageEvent, UsageRollup
+
+    buckets = defaultdict(lambda: {'calls': 0, 'cache_hits': 0, 'prompt_tokens': 0,
+                                   'completion_tokens': 0, 'total_latency_ms': 0})
+    rows = []
+    for event in events:
+        created_at = datetime.utcfromtimestamp(event['created_at'])
+        rows.append(dict(event, created_at=created_at))
+        hour = created_at.replace(minute=0, second=0, microsecond=0)
+        bucket = buckets[(hour, event['user_id'] or 0, event['tool'], event['provider'], event['model'])]
+        bucket['calls'] += 1
+        bucket['cache_hits'] += int(event['cache_hit'])
+        bucket['prompt_tokens'] += event['prompt_tokens']
+        bucket['completion_tokens'] += event['completion_tokens']
+        bucket['total_latency_ms'] += event['latency_ms']
+
+    with app.app_context():
+        try:
+            db.session.execute(insert(UsageEvent), rows)
+            upsert = _upsert_insert(UsageRollup)
+            for (hour, user_id, tool, provider, model), totals in buckets.items():
+                # Atomic increment, so concurrent workers flushing the same
+                # bucket neither collide on insert nor lose updates
+                statement = upsert.values(hour=hour, user_id=user_id, tool=tool,
+                                          provider=provider, model=model, **totals)
+                db.session.execute(statement.on_conflict_do_update(
+                    index_elements=['hour', 'user_id', 'tool', 'provider', 'model'],
+                    set_={field: func.coalesce(getattr(UsageRollup, field), 0) + statement.excluded[field]
+                          for field in totals},
+                ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+def get_usage_summary(user_id, days=7):
+    """Per-tool and per-provider usage for the dashboard, read from rollups only"""
+    from models import UsageRollup
+
+    since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    rows = db.session.query(
+        UsageRollup.tool,
+        UsageRollup.provider,
+        UsageRollup.model,
+        func.sum(UsageRollup.calls),
+        func.sum(UsageRollup.cache_hits),
+        func.sum(UsageRollup.prompt_tokens),
+        func.sum(UsageRollup.completion_tokens),
+        func.sum(UsageRollup.total_latency_ms),
+    ).filter(
+        UsageRollup.user_id == user_id,
+        UsageRollup.hour >= since,
+    ).group_by(UsageRollup.tool, UsageRollup.provider, UsageRollup.model).all()
+
+    summary = {'calls': 0, 'cache_hits': 0, 'tokens': 0, 'cost': 0.0, 'tools': []}
+    for tool, provider, model, calls, cache_hits, prompt_tokens, completion_tokens, latency in rows:
+        calls, cache_hits = calls or 0, cache_hits or 0
+        prompt_tokens, completion_tokens = prompt_tokens or 0, completion_tokens or 0
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        summary['calls'] += calls
+        summary['cache_hits'] += cache_hits
+        summary['tokens'] += prompt_tokens + completion_tokens
+        summary['cost'] += cost
+        summary['tools'].append({
+            'tool': tool,
+            'provider': provider,
+            'model': model,
+            'calls': calls,
+            'cache_hits': cache_hits,
+            'tokens': prompt_tokens + completion_tokens,
+            'avg_latency_ms': int((latency or 0) / calls) if calls else 0,
+            'cost': cost,
+        })
+    summary['tools'].sort(key=lambda row: -row['tokens'])
+    return summary
+
+def init_usage_log(app):
+    """Send buffered provider usage events to the database"""
+    usage_recorder.sink = lambda events: flush_usage_events(app, events)
+    atexit.register(usage_recorder.flush)